@@ -6,30 +6,62 @@ Implements a modular Python agent application for running Spark ETL jobs on Kube
 import sys
 import os
 import argparse
+import itertools
 import json
+import re
 import time
 import signal
-from datetime import datetime
-from typing import Dict, Any, Optional
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 
 # Ensure application directory is in Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-# Import application modules
-from core.logging import setup_logging
-from core.config import get_settings
-from core.spark import SparkManager
-from services.job_service import JobService
+# Prefer orjson for job config parsing; stdlib json accepts the same bytes/str input
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-# Global flag for graceful shutdown
-shutdown_requested = False
+# Heavy application modules (PySpark, pydantic, loguru) are imported inside main()
+# so that --help and --list-job-types return without loading them
+if TYPE_CHECKING:
+    from services.job_service import JobService
+
+from services.job_catalog import JOB_TYPES, list_supported_job_types
+
+# Argument choices come from the lightweight job catalog, not JobService
+JOB_TYPE_CHOICES = tuple(JOB_TYPES)
+LOG_LEVEL_CHOICES = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+
+# Config keys matching this pattern are never logged
+_SENSITIVE_RE = re.compile(r"password|secret|key", re.IGNORECASE)
+
+# Global event for graceful shutdown
+shutdown_event = threading.Event()
+
+# Active Spark session, used to cancel running jobs on a repeated shutdown signal
+_active_spark = None
 
 def signal_handler(signum, frame):
-    """Handle shutdown signals gracefully."""
-    global shutdown_requested
-    shutdown_requested = True
+    """
+    Handle shutdown signals gracefully.
+    
+    The first signal lets the current job finish; a second signal cancels the
+    running Spark jobs so a blocking action returns at the next stage boundary.
+    """
+    if shutdown_event.is_set():
+        if _active_spark is not None:
+            print("\n🛑 Second shutdown signal received. Cancelling running Spark jobs...")
+            # Off the signal handler so we never re-enter an in-flight Py4J call
+            threading.Thread(target=_active_spark.sparkContext.cancelAllJobs, daemon=True).start()
+        return
+    
+    shutdown_event.set()
     print("\n🛑 Shutdown signal received. Finishing current job and exiting...")
 
 def create_argument_parser() -> argparse.ArgumentParser:
@@ -60,13 +92,18 @@ def create_argument_parser() -> argparse.ArgumentParser:
   
   # Force local development mode
   %(prog)s --local --job-type control_m_poc_etl --job-id dev_test --limit 5
+
+⚙️ ENVIRONMENT CONFIGURATION:
+  Set ETL_AGENT_CONFIG_JSON to a JSON job configuration to skip argument parsing.
+  Optional: ETL_AGENT_CONTINUOUS=true, ETL_AGENT_INTERVAL=<seconds>,
+  ETL_AGENT_MODE=local|k8s, LOG_LEVEL=<level>
         """
     )
     
     # Job specification
     job_group = parser.add_argument_group('Job Configuration')
     job_group.add_argument("--job-type", type=str,
-                          choices=["control_m_poc_etl", "jcap_pa_etl"],
+                          choices=JOB_TYPE_CHOICES,
                           help="Type of job to execute")
     job_group.add_argument("--job-id", type=str, help="Unique job identifier")
     job_group.add_argument("--job-config", type=str, help="JSON job configuration string")
@@ -94,33 +131,82 @@ def create_argument_parser() -> argparse.ArgumentParser:
     # Logging
     logging_group = parser.add_argument_group('Logging')
     logging_group.add_argument("--log-level", type=str, default="INFO",
-                              choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                              choices=LOG_LEVEL_CHOICES,
                               help="Logging level (default: INFO)")
     
     return parser
 
-def display_job_types(job_service: JobService) -> None:
+def args_from_env(job_config_json: str) -> argparse.Namespace:
+    """
+    Build arguments from environment variables without constructing the parser.
+    
+    Used when ETL_AGENT_CONFIG_JSON is set and no command-line arguments are given
+    (static per-pod configuration). Raises ValueError naming the bad variable, with the
+    same checks argparse's choices/type would apply.
+    """
+    try:
+        job_config = _json_loads(job_config_json)
+    except ValueError as e:
+        raise ValueError(f"ETL_AGENT_CONFIG_JSON is not valid JSON: {str(e)}") from e
+    if not isinstance(job_config, dict):
+        raise ValueError("ETL_AGENT_CONFIG_JSON must be a JSON object")
+    
+    job_type = job_config.get("type", "control_m_poc_etl")
+    if job_type not in JOB_TYPE_CHOICES:
+        raise ValueError(f"ETL_AGENT_CONFIG_JSON has unknown job type {job_type!r} "
+                         f"(choose from {', '.join(JOB_TYPE_CHOICES)})")
+    
+    log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    if log_level not in LOG_LEVEL_CHOICES:
+        raise ValueError(f"LOG_LEVEL={log_level!r} is invalid (choose from {', '.join(LOG_LEVEL_CHOICES)})")
+    
+    interval_value = os.environ.get("ETL_AGENT_INTERVAL", "60")
+    try:
+        interval = int(interval_value)
+    except ValueError:
+        interval = 0
+    if interval <= 0:
+        raise ValueError(f"ETL_AGENT_INTERVAL={interval_value!r} must be a positive integer (seconds)")
+    
+    mode = os.environ.get("ETL_AGENT_MODE", "").lower()
+    return argparse.Namespace(
+        job_type=None,
+        job_id=None,
+        job_config=job_config_json,
+        job_config_file=None,
+        list_job_types=False,
+        load_date=None,
+        limit=10,
+        continuous=os.environ.get("ETL_AGENT_CONTINUOUS", "").lower() in ("1", "true", "yes"),
+        interval=interval,
+        local=mode == "local",
+        k8s=mode == "k8s",
+        log_level=log_level
+    )
+
+def display_job_types() -> None:
     """Display available job types with detailed information."""
-    print("\n" + "="*80)
-    print("🚀 ENHANCED SPARK ETL AGENT - SUPPORTED JOB TYPES")
-    print("="*80)
+    lines = ["", "="*80, "🚀 ENHANCED SPARK ETL AGENT - SUPPORTED JOB TYPES", "="*80]
     
-    job_types = job_service.list_supported_job_types()
+    job_types = list_supported_job_types()
     
     for i, (job_type, description) in enumerate(job_types.items(), 1):
-        print(f"\n{i}. 🔧 {job_type}")
-        print(f"   {description}")
+        lines.append(f"\n{i}. 🔧 {job_type}")
+        lines.append(f"   {description}")
         
         # Add usage example
         if job_type == "control_m_poc_etl":
-            print(f"   💡 Example: python3 app.py --job-type {job_type} --job-id poc_001 --limit 10")
+            lines.append(f"   💡 Example: python3 app.py --job-type {job_type} --job-id poc_001 --limit 10")
         elif job_type == "jcap_pa_etl":
-            print(f"   💡 Example: python3 app.py --job-type {job_type} --job-id jcap_daily")
+            lines.append(f"   💡 Example: python3 app.py --job-type {job_type} --job-id jcap_daily")
+    
+    lines.append(f"\n{'='*80}")
+    lines.append("💡 Use --job-type <type> to specify which job to run")
+    lines.append("📖 Use --help for complete usage information")
+    lines.append("="*80 + "\n")
     
-    print(f"\n{'='*80}")
-    print("💡 Use --job-type <type> to specify which job to run")
-    print("📖 Use --help for complete usage information")
-    print("="*80 + "\n")
+    # Single write instead of one print (and stdout lock) per line
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def create_job_config_from_args(args) -> Optional[Dict[str, Any]]:
     """Create job configuration from command-line arguments."""
@@ -143,48 +229,77 @@ def create_job_config_from_args(args) -> Optional[Dict[str, Any]]:
 def load_job_config_from_file(file_path: str) -> Dict[str, Any]:
     """Load job configuration from JSON file."""
     try:
-        with open(file_path, 'r') as f:
-            config = json.load(f)
+        with open(file_path, 'rb') as f:
+            config = _json_loads(f.read())
         return config
     except (FileNotFoundError, json.JSONDecodeError) as e:
         raise RuntimeError(f"Failed to load job config from {file_path}: {str(e)}") from e
 
-def execute_single_job(job_service: JobService, job_config: Dict[str, Any]) -> Dict[str, Any]:
+def validate_job_config(job_config: Dict[str, Any]) -> List[str]:
+    """Validate job configuration once up front and return any missing required fields."""
+    required_fields = ["type", "id"]
+    return [field for field in required_fields if field not in job_config]
+
+# (next local midnight as epoch seconds, "YYYY-MM-DD") - recomputed only on rollover
+_load_date_cache = (0.0, "")
+
+def current_load_date() -> str:
+    """Get today's load date string, formatting it once per calendar day."""
+    global _load_date_cache
+    if time.time() >= _load_date_cache[0]:
+        today = date.today()
+        next_midnight = datetime.combine(today + timedelta(days=1), datetime.min.time())
+        _load_date_cache = (next_midnight.timestamp(), today.strftime("%Y-%m-%d"))
+    return _load_date_cache[1]
+
+def execute_single_job(job_service: "JobService", job_config: Dict[str, Any]) -> Dict[str, Any]:
     """Execute a single job with preprocessing."""
     # Set current date if load_date is not specified
     if not job_config.get("load_date"):
-        job_config["load_date"] = datetime.now().strftime("%Y-%m-%d")
+        job_config["load_date"] = current_load_date()
     
     return job_service.execute_job(job_config)
 
-def run_continuous_jobs(job_service: JobService, job_config: Dict[str, Any], 
+def run_continuous_jobs(job_service: "JobService", job_config: Dict[str, Any], 
                        interval: int) -> Dict[str, Any]:
     """Run jobs continuously with comprehensive monitoring."""
     from loguru import logger
     
     logger.info("🔄 Starting continuous job execution")
     
-    stats = {
-        "total_runs": 0,
-        "successful_runs": 0,
-        "failed_runs": 0,
-        "total_rows_processed": 0,
-        "start_time": datetime.now()
-    }
+    # Plain local counters; the stats dict is only built once on exit
+    total_runs = 0
+    successful_runs = 0
+    failed_runs = 0
+    total_rows_processed = 0
+    start_time = datetime.now()
+    start_monotonic = time.monotonic()
+    
+    # Emit cumulative stats roughly once a minute rather than after every run
+    log_every = max(1, 60 // max(1, interval))
+    
+    # Shared template - only load_date is overlaid per run
+    base_config = dict(job_config)
+    fixed_load_date = base_config.get("load_date")
     
-    while not shutdown_requested:
-        stats["total_runs"] += 1
-        run_number = stats["total_runs"]
+    # Runs are scheduled on a fixed monotonic cadence so job duration does not add drift
+    next_tick = time.monotonic()
+    
+    for run_number in itertools.count(1):
+        if shutdown_event.is_set():
+            break
+        total_runs = run_number
         
         logger.info(f"🎬 Starting job execution #{run_number}")
         
         try:
-            result = execute_single_job(job_service, job_config.copy())
+            run_config = {**base_config, "load_date": fixed_load_date or current_load_date()}
+            result = job_service.execute_job(run_config)
             
             if result["status"] == "Success":
-                stats["successful_runs"] += 1
+                successful_runs += 1
                 rows_processed = result.get("rows_processed", 0)
-                stats["total_rows_processed"] += rows_processed
+                total_rows_processed += rows_processed
                 
                 logger.info(f"✅ Run #{run_number} completed successfully!")
                 logger.info(f"📊 Processed {rows_processed:,} rows")
@@ -199,38 +314,51 @@ def run_continuous_jobs(job_service: JobService, job_config: Dict[str, Any],
                         email_sent = result.get("email_sent", False)
                         logger.warning(f"⚠️ Variance alert sent: {email_sent}")
             else:
-                stats["failed_runs"] += 1
+                failed_runs += 1
                 error = result.get("error", "Unknown error")
                 logger.error(f"❌ Run #{run_number} failed: {error}")
             
-            # Log cumulative stats
-            success_rate = (stats["successful_runs"] / stats["total_runs"]) * 100
-            logger.info(f"📈 Stats: {stats['successful_runs']}/{stats['total_runs']} "
-                       f"({success_rate:.1f}% success), "
-                       f"{stats['total_rows_processed']:,} total rows")
-            
         except Exception as e:
-            stats["failed_runs"] += 1
+            failed_runs += 1
             logger.exception(f"💥 Unhandled exception in run #{run_number}")
         
-        # Wait for next execution
-        if not shutdown_requested:
-            logger.info(f"⏳ Waiting {interval} seconds before next run...")
-            for _ in range(interval):
-                if shutdown_requested:
-                    break
-                time.sleep(1)
+        # Log cumulative stats on a coarse cadence
+        if run_number % log_every == 0:
+            success_rate = (successful_runs / total_runs) * 100
+            logger.info(f"📈 Stats: {successful_runs}/{total_runs} "
+                       f"({success_rate:.1f}% success), "
+                       f"{total_rows_processed:,} total rows")
+        
+        # Wait for next execution (returns immediately on shutdown signal)
+        if not shutdown_event.is_set():
+            next_tick += interval
+            sleep_for = next_tick - time.monotonic()
+            if sleep_for <= 0:
+                # Run overran the interval - start now and re-anchor instead of bursting
+                next_tick = time.monotonic()
+                sleep_for = 0
+            logger.info(f"⏳ Waiting {sleep_for:.1f} seconds before next run...")
+            if shutdown_event.wait(timeout=sleep_for):
+                break
+    
+    stats = {
+        "total_runs": total_runs,
+        "successful_runs": successful_runs,
+        "failed_runs": failed_runs,
+        "total_rows_processed": total_rows_processed,
+        "start_time": start_time
+    }
     
     # Final statistics
-    total_duration = (datetime.now() - stats["start_time"]).total_seconds()
-    success_rate = (stats["successful_runs"] / stats["total_runs"]) * 100 if stats["total_runs"] > 0 else 0
+    total_duration = time.monotonic() - start_monotonic
+    success_rate = (successful_runs / total_runs) * 100 if total_runs > 0 else 0
     
     logger.info("🏁 Continuous execution completed")
     logger.info(f"📊 Final Statistics:")
-    logger.info(f"   Total Runs: {stats['total_runs']}")
-    logger.info(f"   Successful: {stats['successful_runs']} ({success_rate:.1f}%)")
-    logger.info(f"   Failed: {stats['failed_runs']}")
-    logger.info(f"   Total Rows: {stats['total_rows_processed']:,}")
+    logger.info(f"   Total Runs: {total_runs}")
+    logger.info(f"   Successful: {successful_runs} ({success_rate:.1f}%)")
+    logger.info(f"   Failed: {failed_runs}")
+    logger.info(f"   Total Rows: {total_rows_processed:,}")
     logger.info(f"   Duration: {total_duration:.2f} seconds")
     
     return stats
@@ -241,9 +369,28 @@ def main() -> int:
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
     
-    # Parse arguments
-    parser = create_argument_parser()
-    args = parser.parse_args()
+    # Parse arguments. Static pod configuration via env skips argparse, but only when no
+    # arguments were given, so --help, --list-job-types and explicit jobs always win
+    env_job_config = os.environ.get("ETL_AGENT_CONFIG_JSON")
+    if env_job_config and len(sys.argv) == 1:
+        try:
+            args = args_from_env(env_job_config)
+        except ValueError as e:
+            print(f"❌ Invalid environment configuration: {str(e)}", file=sys.stderr)
+            return 2
+    else:
+        parser = create_argument_parser()
+        args = parser.parse_args()
+    
+    # Handle list job types before any Spark/settings initialization
+    if args.list_job_types:
+        display_job_types()
+        return 0
+    
+    from core.logging import setup_logging
+    from core.config import get_settings
+    from core.spark import SparkManager
+    from services.job_service import JobService
     
     # secrets_name = args.secrets_name
 
@@ -282,20 +429,21 @@ def main() -> int:
         logger.info("⚡ Initializing Spark session...")
         spark = spark_manager.create_spark_session()
         
+        global _active_spark
+        _active_spark = spark
+        
+        # Warm the JVM/JDBC driver in the background while the services initialize
+        threading.Thread(target=spark_manager.warm_up, daemon=True).start()
+        
         # Initialize job service
         job_service = JobService(spark)
         
-        # Handle list job types
-        if args.list_job_types:
-            display_job_types(job_service)
-            return 0
-        
         # Determine job configuration
         job_config = None
         
         if args.job_config:
             try:
-                job_config = json.loads(args.job_config)
+                job_config = _json_loads(args.job_config)
                 logger.info("📋 Using JSON job configuration from command line")
             except json.JSONDecodeError as e:
                 logger.error(f"❌ Invalid JSON configuration: {str(e)}")
@@ -321,17 +469,15 @@ def main() -> int:
                 logger.info("   python3 app.py --list-job-types")
                 return 1
         
-        # Validate configuration
-        required_fields = ["type", "id"]
-        missing_fields = [field for field in required_fields if field not in job_config]
+        # Validate configuration once - continuous runs reuse the validated config
+        missing_fields = validate_job_config(job_config)
         
         if missing_fields:
             logger.error(f"❌ Missing required fields: {missing_fields}")
             return 1
         
         # Log safe configuration
-        safe_config = {k: v for k, v in job_config.items() 
-                      if not any(sensitive in k.lower() for sensitive in ["password", "secret", "key"])}
+        safe_config = {k: v for k, v in job_config.items() if not _SENSITIVE_RE.search(k)}
         logger.info(f"🎯 Job configuration: {safe_config}")
         
         # Execute job(s)
@@ -377,6 +523,9 @@ def main() -> int:
         # Cleanup
         if 'spark_manager' in locals() and hasattr(spark_manager, 'spark') and spark_manager.spark:
             logger.info("🧹 Cleaning up Spark resources...")
+            # Pools live in the driver JVM, so close them while it is still running
+            from utils.db_utils import close_redshift_connectors
+            close_redshift_connectors()
             spark_manager.stop_spark_session()
 
 if __name__ == "__main__":
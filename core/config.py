@@ -11,13 +11,81 @@ Environment Setup:
 """
 import os
 from typing import Optional, List
-from pydantic import Field, validator
+from pydantic import Field, computed_field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from loguru import logger
 
-load_dotenv()
+# Parse .env once per process tree; child processes inherit the loaded environment
+if not os.getenv("SETTINGS_LOADED"):
+    load_dotenv()
+    os.environ["SETTINGS_LOADED"] = "1"
+
+# Configuration fields loaded from Secrets Manager (secret keys match field names)
+SECRET_FIELDS = frozenset({
+    # POC Redshift
+    "REDSHIFT_HOST",
+    "REDSHIFT_PORT",
+    "REDSHIFT_DATABASE",
+    "REDSHIFT_USER",
+    "REDSHIFT_PASSWORD",
+
+    # CDP Redshift
+    "CDP_REDSHIFT_HOST",
+    "CDP_REDSHIFT_PORT",
+    "CDP_REDSHIFT_DATABASE",
+    "CDP_REDSHIFT_USER",
+    "CDP_REDSHIFT_PASSWORD",
+    "CDP_REDSHIFT_SCHEMA",
+
+    # JCAP Redshift
+    "JCAP_REDSHIFT_HOST",
+    "JCAP_REDSHIFT_PORT",
+    "JCAP_REDSHIFT_DATABASE",
+    "JCAP_REDSHIFT_USER",
+    "JCAP_REDSHIFT_PASSWORD",
+    "JCAP_REDSHIFT_SCHEMA",
+
+    # K8s Configuration
+    "K8S_MASTER_URL",
+    "K8S_NAMESPACE",
+    "K8S_SERVICE_ACCOUNT",
+    "K8S_CONTAINER_IMAGE",
+    "K8S_IMAGE_PULL_SECRETS",
+
+    # S3 Configuration
+    "S3_BUCKET",
+    "S3_REGION",
+    "S3_IAM_ROLE",
+
+    # other configurations
+    "AWS_SECRET_NAME",
+    "SPARK_DRIVER_HOST",
+})
+
+VALID_LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+
+# Configuration fields that must be set for each job type (ordered for stable error messages)
+REQUIRED_FIELDS = {
+    "jcap_pa_etl": (
+        # CDP configuration
+        "CDP_REDSHIFT_HOST",
+        "CDP_REDSHIFT_DATABASE",
+        "CDP_REDSHIFT_USER",
+        "CDP_REDSHIFT_PASSWORD",
+
+        # JCAP configuration
+        "JCAP_REDSHIFT_HOST",
+        "JCAP_REDSHIFT_DATABASE",
+        "JCAP_REDSHIFT_USER",
+        "JCAP_REDSHIFT_PASSWORD",
+
+        # S3 configuration
+        "S3_BUCKET",
+        "S3_IAM_ROLE",
+    ),
+}
 
 class Settings(BaseSettings):
     """
@@ -31,6 +99,7 @@ class Settings(BaseSettings):
     SPARK_APP_NAME: str = Field(default="jph-etl-spark-agent", description="Spark application name")
     SPARK_DRIVER_HOST: str = Field(default="headless-spark-etl-jph", description="Spark driver host")
     SPARK_DRIVER_PORT: str = Field(default="2223", description="Spark driver port")
+    USE_ARROW: bool = Field(default=False, description="Enable Arrow for pandas conversions in Spark")
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
     DATA_VARIANCE_THRESHOLD: float = Field(default=5.0, description="Data variance threshold percentage")
     
@@ -48,6 +117,10 @@ class Settings(BaseSettings):
     REDSHIFT_USER: str = Field(default="", description="POC Redshift user")
     REDSHIFT_PASSWORD: str = Field(default="", description="POC Redshift password")
     REDSHIFT_JDBC_DRIVER_PATH: str = Field(default="/opt/spark/jars/redshift-jdbc42-2.1.0.29.jar", description="JDBC driver path")
+    JDBC_WRITE_PARTITIONS: int = Field(default=8, description="Maximum parallel JDBC connections per write (0 = Spark default parallelism)")
+    JDBC_WRITE_BATCH_SIZE: int = Field(default=10000, description="Rows per JDBC insert batch")
+    JDBC_POOL_SIZE: int = Field(default=4, description="Maximum pooled driver-side JDBC connections per connector")
+    JDBC_FETCH_SIZE: int = Field(default=10000, description="Rows fetched per JDBC read round-trip")
     
     # CDP Redshift Configuration (from Secrets Manager)
     CDP_REDSHIFT_HOST: str = Field(default="", description="CDP Redshift host")
@@ -69,6 +142,7 @@ class Settings(BaseSettings):
     S3_BUCKET: str = Field(default="itx-ahr-jcap-jph-data/test", description="S3 bucket for data staging")
     S3_REGION: str = Field(default="us-east-1", description="S3 region")
     S3_IAM_ROLE: str = Field(default="", description="IAM role for S3/Redshift operations")
+    S3_STAGE_FILES: int = Field(default=8, description="Parquet files written per S3 staging run (COPY loads them in parallel)")
     S3_ACCESS_KEY: Optional[str] = Field(default="", description="S3 access key (optional)")
     S3_SECRET_KEY: Optional[str] = Field(default="", description="S3 secret key (optional)")
     
@@ -84,32 +158,14 @@ class Settings(BaseSettings):
     # AWS configs
     AWS_SECRET_NAME: str = Field(default="", description="AWS Secrets Manager secret name")
 
-    # Computed properties
-    REDSHIFT_JDBC_URL: str = ""
-    CDP_REDSHIFT_JDBC_URL: str = ""
-    JCAP_REDSHIFT_JDBC_URL: str = ""
-    
+    # .env is already merged into os.environ by the one-shot load_dotenv() above,
+    # so pydantic-settings only reads the environment (no second .env parse)
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-        case_sensitive=True,
-        validate_assignment=True
+        case_sensitive=True
     )
     
-    def __init__(self, **data):
-        """Initialize settings and load from Secrets Manager"""
-
-        # First, initialize with defaults and env vars
-        super().__init__(**data)
-        
-        # Then load sensitive values from Secrets Manager
-        self._load_from_secrets_manager()
-        
-        # Finally, compute derived values
-        self._compute_jdbc_urls()
-    
-    def _load_from_secrets_manager(self):
-        """Load sensitive configuration from AWS Secrets Manager"""
+    def _load_from_secrets_manager(self) -> dict:
+        """Fetch sensitive configuration from AWS Secrets Manager (empty if unavailable)"""
         try:
             from utils.secrets_manager import get_secrets_manager
             
@@ -119,123 +175,98 @@ class Settings(BaseSettings):
             secrets_manager = get_secrets_manager()
             logger.info(f"📋 Using secret: {secrets_manager.secret_name}")
             
-            # Mapping of secret keys to configuration fields
-            secret_mappings = {
-                # POC Redshift
-                "REDSHIFT_HOST": "REDSHIFT_HOST",
-                "REDSHIFT_PORT": "REDSHIFT_PORT",
-                "REDSHIFT_DATABASE": "REDSHIFT_DATABASE", 
-                "REDSHIFT_USER": "REDSHIFT_USER",
-                "REDSHIFT_PASSWORD": "REDSHIFT_PASSWORD",
-                
-                # CDP Redshift
-                "CDP_REDSHIFT_HOST": "CDP_REDSHIFT_HOST",
-                "CDP_REDSHIFT_PORT": "CDP_REDSHIFT_PORT",
-                "CDP_REDSHIFT_DATABASE": "CDP_REDSHIFT_DATABASE",
-                "CDP_REDSHIFT_USER": "CDP_REDSHIFT_USER", 
-                "CDP_REDSHIFT_PASSWORD": "CDP_REDSHIFT_PASSWORD",
-                "CDP_REDSHIFT_SCHEMA": "CDP_REDSHIFT_SCHEMA",
-                
-                # JCAP Redshift
-                "JCAP_REDSHIFT_HOST": "JCAP_REDSHIFT_HOST",
-                "JCAP_REDSHIFT_PORT": "JCAP_REDSHIFT_PORT",
-                "JCAP_REDSHIFT_DATABASE": "JCAP_REDSHIFT_DATABASE",
-                "JCAP_REDSHIFT_USER": "JCAP_REDSHIFT_USER",
-                "JCAP_REDSHIFT_PASSWORD": "JCAP_REDSHIFT_PASSWORD",
-                "JCAP_REDSHIFT_SCHEMA": "JCAP_REDSHIFT_SCHEMA",
-
-                # K8s Configuration
-                "K8S_MASTER_URL": "K8S_MASTER_URL",
-                "K8S_NAMESPACE": "K8S_NAMESPACE",
-                "K8S_SERVICE_ACCOUNT": "K8S_SERVICE_ACCOUNT",
-                "K8S_CONTAINER_IMAGE": "K8S_CONTAINER_IMAGE",
-                "K8S_IMAGE_PULL_SECRETS": "K8S_IMAGE_PULL_SECRETS",
-
-                # S3 Configuration
-                "S3_BUCKET": "S3_BUCKET",
-                "S3_REGION": "S3_REGION",
-                "S3_IAM_ROLE": "S3_IAM_ROLE",
-                
-                # other configurations
-                "AWS_SECRET_NAME": "AWS_SECRET_NAME",
-                "SPARK_DRIVER_HOST": "SPARK_DRIVER_HOST",
-
-            }
+            # Fetch the whole secret in a single GetSecretValue call, then map in memory
+            secret_values = secrets_manager.get_secret_values()
             
-            # Load each secret value
-            loaded_count = 0
-            for secret_key, config_field in secret_mappings.items():
-                secret_value = secrets_manager.get_secret_value(secret_key)
-                if secret_value:
-                    setattr(self, config_field, secret_value)
-                    loaded_count += 1
+            # Only the secret-backed fields; get_settings() validates them into the instance
+            updates = {
+                field: str(secret_values[field])
+                for field in SECRET_FIELDS
+                if secret_values.get(field)
+            }
             
-            logger.info(f"✅ Loaded {loaded_count} configuration values from Secrets Manager")
+            logger.info(f"✅ Loaded {len(updates)} configuration values from Secrets Manager")
+            return updates
             
         except Exception as e:
             logger.warning(f"⚠️ Failed to load from Secrets Manager, using defaults: {str(e)}")
             logger.warning("Falling back to environment variables if available")
+            return {}
     
-    def _compute_jdbc_urls(self):
-        """Compute JDBC URLs from individual components"""
-        if self.REDSHIFT_HOST:
-            self.REDSHIFT_JDBC_URL = f"jdbc:redshift://{self.REDSHIFT_HOST}:{self.REDSHIFT_PORT}/{self.REDSHIFT_DATABASE}"
-        
-        if self.CDP_REDSHIFT_HOST:
-            self.CDP_REDSHIFT_JDBC_URL = f"jdbc:redshift://{self.CDP_REDSHIFT_HOST}:{self.CDP_REDSHIFT_PORT}/{self.CDP_REDSHIFT_DATABASE}"
-        
-        if self.JCAP_REDSHIFT_HOST:
-            self.JCAP_REDSHIFT_JDBC_URL = f"jdbc:redshift://{self.JCAP_REDSHIFT_HOST}:{self.JCAP_REDSHIFT_PORT}/{self.JCAP_REDSHIFT_DATABASE}"
+    # Computed properties (built on first access, then cached on the instance)
+    @computed_field
+    @cached_property
+    def REDSHIFT_JDBC_URL(self) -> str:
+        """POC Redshift JDBC URL computed from individual components"""
+        if not self.REDSHIFT_HOST:
+            return ""
+        return f"jdbc:redshift://{self.REDSHIFT_HOST}:{self.REDSHIFT_PORT}/{self.REDSHIFT_DATABASE}"
     
-    @validator('DATA_VARIANCE_THRESHOLD')
-    def validate_variance_threshold(cls, v):
+    @computed_field
+    @cached_property
+    def CDP_REDSHIFT_JDBC_URL(self) -> str:
+        """CDP Redshift JDBC URL computed from individual components"""
+        if not self.CDP_REDSHIFT_HOST:
+            return ""
+        return f"jdbc:redshift://{self.CDP_REDSHIFT_HOST}:{self.CDP_REDSHIFT_PORT}/{self.CDP_REDSHIFT_DATABASE}"
+    
+    @computed_field
+    @cached_property
+    def JCAP_REDSHIFT_JDBC_URL(self) -> str:
+        """JCAP Redshift JDBC URL computed from individual components"""
+        if not self.JCAP_REDSHIFT_HOST:
+            return ""
+        return f"jdbc:redshift://{self.JCAP_REDSHIFT_HOST}:{self.JCAP_REDSHIFT_PORT}/{self.JCAP_REDSHIFT_DATABASE}"
+    
+    @cached_property
+    def REDSHIFT_JDBC_DRIVER_PATH_RESOLVED(self) -> Optional[str]:
+        """JDBC driver jar path if the file exists, checked once per process"""
+        if os.path.exists(self.REDSHIFT_JDBC_DRIVER_PATH):
+            return self.REDSHIFT_JDBC_DRIVER_PATH
+        return None
+    
+    @field_validator('DATA_VARIANCE_THRESHOLD')
+    @classmethod
+    def validate_variance_threshold(cls, v: float) -> float:
+        # Runs after float coercion so the range check compares numbers
         if v < 0 or v > 100:
             raise ValueError('DATA_VARIANCE_THRESHOLD must be between 0 and 100')
         return v
     
-    @validator('LOG_LEVEL')
-    def validate_log_level(cls, v):
-        valid_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
-        if v.upper() not in valid_levels:
-            raise ValueError(f'LOG_LEVEL must be one of {valid_levels}')
-        return v.upper()
+    @field_validator('LOG_LEVEL', mode='before')
+    @classmethod
+    def validate_log_level(cls, v) -> str:
+        # Normalize before str validation so the core validator sees the canonical form
+        level = str(v).upper()
+        if level not in VALID_LOG_LEVELS:
+            raise ValueError(f'LOG_LEVEL must be one of {list(VALID_LOG_LEVELS)}')
+        return level
     
     def validate_for_job_type(self, job_type: str) -> None:
         """Validate that required configurations are present for specific job types."""
-        if job_type == "jcap_pa_etl":
-            missing_fields = []
-            
-            # Check CDP configuration
-            if not self.CDP_REDSHIFT_HOST:
-                missing_fields.append("CDP_REDSHIFT_HOST")
-            if not self.CDP_REDSHIFT_DATABASE:
-                missing_fields.append("CDP_REDSHIFT_DATABASE")
-            if not self.CDP_REDSHIFT_USER:
-                missing_fields.append("CDP_REDSHIFT_USER")
-            if not self.CDP_REDSHIFT_PASSWORD:
-                missing_fields.append("CDP_REDSHIFT_PASSWORD")
-            
-            # Check JCAP configuration
-            if not self.JCAP_REDSHIFT_HOST:
-                missing_fields.append("JCAP_REDSHIFT_HOST")
-            if not self.JCAP_REDSHIFT_DATABASE:
-                missing_fields.append("JCAP_REDSHIFT_DATABASE")
-            if not self.JCAP_REDSHIFT_USER:
-                missing_fields.append("JCAP_REDSHIFT_USER")
-            if not self.JCAP_REDSHIFT_PASSWORD:
-                missing_fields.append("JCAP_REDSHIFT_PASSWORD")
-            
-            # Check S3 configuration
-            if not self.S3_BUCKET:
-                missing_fields.append("S3_BUCKET")
-            if not self.S3_IAM_ROLE:
-                missing_fields.append("S3_IAM_ROLE")
-            
-            if missing_fields:
-                raise ValueError(
-                    f"Missing required configuration for {job_type}: {', '.join(missing_fields)}"
-                )
+        missing_fields = [field for field in REQUIRED_FIELDS.get(job_type, ()) if not getattr(self, field)]
+        
+        if missing_fields:
+            raise ValueError(
+                f"Missing required configuration for {job_type}: {', '.join(missing_fields)}"
+            )
 
+@lru_cache(maxsize=None)
 def get_settings() -> Settings:
-    """Get cached application settings."""
-    return Settings()
\ No newline at end of file
+    """
+    Get cached application settings.
+    
+    Secrets Manager values are loaded here, before the instance is shared, so every
+    field, computed JDBC URL and model_dump() sees the same values.
+    
+    Cache reads are safe from any thread. Two threads racing on the very first
+    call may each build a Settings instance; call this once on the Spark driver's
+    main thread before starting worker threads.
+    """
+    settings = Settings()
+    secret_values = settings._load_from_secrets_manager()
+    if secret_values:
+        # Rebuild with the secrets as init values (which take priority over the environment),
+        # so field validators run and model_fields_set stays accurate
+        settings = Settings(**secret_values)
+    return settings
\ No newline at end of file
@@ -1,22 +1,128 @@
 """
 Enhanced email service with production features.
 """
+import atexit
 import smtplib
-from email.mime.multipart import MIMEMultipart
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from string import Template
 from email.mime.text import MIMEText
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Union, List, Optional
 from loguru import logger
 from core.config import get_settings
 
+# Background sender so notifications don't hold up job completion; one worker
+# because all sends share a single SMTP connection. Pending mails are flushed at exit.
+_EMAIL_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="email")
+atexit.register(_EMAIL_POOL.shutdown, wait=True)
+
+# Timestamp shown in notification bodies
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S UTC"
+
+# Notification bodies, compiled once at import
+VARIANCE_ALERT_TEMPLATE = Template("""🚨 DATA VARIANCE ALERT - IMMEDIATE ATTENTION REQUIRED
+
+Job: $job_name
+Timestamp: $timestamp
+
+📊 VARIANCE DETAILS:
+Previous Count: $previous_count rows
+Current Count: $current_count rows
+Variance: $variance%
+Threshold: $threshold%
+
+⚠️ The data variance exceeds the configured threshold. Please investigate:
+• Data source changes
+• ETL logic modifications
+• Data quality issues
+• System performance problems
+
+🔍 RECOMMENDED ACTIONS:
+1. Review source data for anomalies
+2. Check ETL logs for errors or warnings
+3. Validate data transformation logic
+4. Compare with historical patterns
+5. Contact data engineering team if needed
+
+This is an automated alert from the ETL monitoring system.
+Please acknowledge receipt and provide status updates.
+
+Best regards,
+Madhunil Pachghare""")
+
+JOB_SUCCESS_TEMPLATE = Template("""✅ JOB COMPLETED SUCCESSFULLY
+
+Job: $job_name
+Status: $status
+Completion Time: $timestamp
+Duration: $duration seconds
+Rows Processed: $rows_processed
+Variance: $variance%
+
+The job was executed without any issues by the JPH-spark-etl-agent. The variance and time taken is displayed above.
+
+Best regards,
+Madhunil Pachghare""")
+
+JOB_FAILURE_TEMPLATE = Template("""❌ JOB EXECUTION FAILED
+
+Job: $job_name
+Status: $status
+Failure Time: $timestamp
+Duration: $duration seconds
+Error: $error_message
+
+Please investigate the issue and take corrective action.
+
+Best regards,
+Madhunil Pachghare""")
+
 class EmailService:
     """Production-ready email notification service."""
     
     def __init__(self):
         """Initialize email service."""
         self.settings = get_settings()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._smtp_lock = threading.Lock()
+        atexit.register(self.close)
         logger.info("📧 Email Service initialized")
     
+    def _get_smtp(self) -> smtplib.SMTP:
+        """Get the shared SMTP connection, reconnecting if the server dropped it."""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        
+        server = smtplib.SMTP(self.settings.SMTP_SERVER, self.settings.SMTP_PORT)
+        try:
+            if self.settings.SMTP_USE_TLS:
+                server.starttls()
+            
+            if self.settings.SMTP_USERNAME and self.settings.SMTP_PASSWORD:
+                server.login(self.settings.SMTP_USERNAME, self.settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        return server
+    
+    def close(self) -> None:
+        """Close the shared SMTP connection."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self._smtp.close()
+            finally:
+                self._smtp = None
+    
     def send_email(self, to_email: Union[str, List[str]], subject: str, 
                    body: str, from_email: Optional[str] = None) -> bool:
         """Send email with enhanced error handling."""
@@ -26,20 +132,19 @@ class EmailService:
             
             logger.info(f"📤 Sending email: '{subject}' to {len(recipients)} recipient(s)")
             
-            msg = MIMEMultipart()
+            # Single plain-text part; no multipart container needed
+            msg = MIMEText(body, 'plain', 'utf-8')
             msg['From'] = sender
             msg['To'] = ', '.join(recipients)
             msg['Subject'] = subject
-            msg.attach(MIMEText(body, 'plain'))
             
-            with smtplib.SMTP(self.settings.SMTP_SERVER, self.settings.SMTP_PORT) as server:
-                if self.settings.SMTP_USE_TLS:
-                    server.starttls()
-                
-                if self.settings.SMTP_USERNAME and self.settings.SMTP_PASSWORD:
-                    server.login(self.settings.SMTP_USERNAME, self.settings.SMTP_PASSWORD)
-                
-                server.sendmail(sender, recipients, msg.as_string())
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg, from_addr=sender, to_addrs=recipients)
+                except Exception:
+                    # Drop the connection so the next send starts fresh
+                    self.close()
+                    raise
             
             logger.info("✅ Email sent successfully")
             return True
@@ -48,45 +153,27 @@ class EmailService:
             logger.exception(f"❌ Failed to send email: {str(e)}")
             return False
     
+    def send_email_async(self, to_email: Union[str, List[str]], subject: str,
+                         body: str, from_email: Optional[str] = None) -> "Future[bool]":
+        """Queue an email on the background sender and return its future."""
+        return _EMAIL_POOL.submit(self.send_email, to_email, subject, body, from_email)
+    
     def send_data_variance_alert(self, variance_percentage: float, job_name: str,
                                previous_count: int, current_count: int) -> bool:
         """Send formatted data variance alert."""
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
             
             subject = f"🚨 Data Variance Alert - {job_name}"
             
-            body = f"""
-                    🚨 DATA VARIANCE ALERT - IMMEDIATE ATTENTION REQUIRED
-
-                    Job: {job_name}
-                    Timestamp: {timestamp}
-
-                    📊 VARIANCE DETAILS:
-                    Previous Count: {previous_count:,} rows
-                    Current Count: {current_count:,} rows
-                    Variance: {variance_percentage:.2f}%
-                    Threshold: {self.settings.DATA_VARIANCE_THRESHOLD}%
-
-                    ⚠️ The data variance exceeds the configured threshold. Please investigate:
-                    • Data source changes
-                    • ETL logic modifications
-                    • Data quality issues
-                    • System performance problems
-
-                    🔍 RECOMMENDED ACTIONS:
-                    1. Review source data for anomalies
-                    2. Check ETL logs for errors or warnings
-                    3. Validate data transformation logic
-                    4. Compare with historical patterns
-                    5. Contact data engineering team if needed
-
-                    This is an automated alert from the ETL monitoring system.
-                    Please acknowledge receipt and provide status updates.
-
-                    Best regards,
-                    Madhunil Pachghare
-                    """.strip()
+            body = VARIANCE_ALERT_TEMPLATE.substitute(
+                job_name=job_name,
+                timestamp=timestamp,
+                previous_count=f"{previous_count:,}",
+                current_count=f"{current_count:,}",
+                variance=f"{variance_percentage:.2f}",
+                threshold=self.settings.DATA_VARIANCE_THRESHOLD
+            )
             
             return self.send_email(
                 to_email=self.settings.EMAIL_TO_DNA_TEAM,
@@ -100,47 +187,33 @@ class EmailService:
     
     def send_job_completion_notification(self, job_name: str, status: str,
                                        duration: float, rows_processed: int = 0, variance_percentage: Optional[float] = None,
-                                       error_message: Optional[str] = None) -> bool:
-        """Send job completion notification."""
+                                       error_message: Optional[str] = None) -> "Future[bool]":
+        """Queue job completion notification; the returned future resolves to the send result."""
         try:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            timestamp = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
             status_emoji = "✅" if status == "Success" else "❌"
             
             subject = f"{status_emoji} {job_name} - {status}"
             
             if status == "Success":
-                body = f"""
-                        ✅ JOB COMPLETED SUCCESSFULLY
-
-                        Job: {job_name}
-                        Status: {status}
-                        Completion Time: {timestamp}
-                        Duration: {duration:.2f} seconds
-                        Rows Processed: {rows_processed}
-                        Variance: {variance_percentage:.2f}%
-
-                        The job was executed without any issues by the JPH-spark-etl-agent. The variance and time taken is displayed above.
-
-                        Best regards,
-                        Madhunil Pachghare
-                        """.strip()
+                body = JOB_SUCCESS_TEMPLATE.substitute(
+                    job_name=job_name,
+                    status=status,
+                    timestamp=timestamp,
+                    duration=f"{duration:.2f}",
+                    rows_processed=rows_processed,
+                    variance=f"{variance_percentage:.2f}"
+                )
             else:
-                body = f"""
-                        ❌ JOB EXECUTION FAILED
-
-                        Job: {job_name}
-                        Status: {status}
-                        Failure Time: {timestamp}
-                        Duration: {duration:.2f} seconds
-                        Error: {error_message or 'Unknown error'}
-
-                        Please investigate the issue and take corrective action.
-
-                        Best regards,
-                        Madhunil Pachghare
-                        """.strip()
+                body = JOB_FAILURE_TEMPLATE.substitute(
+                    job_name=job_name,
+                    status=status,
+                    timestamp=timestamp,
+                    duration=f"{duration:.2f}",
+                    error_message=error_message or 'Unknown error'
+                )
             
-            return self.send_email(
+            return self.send_email_async(
                 to_email=self.settings.EMAIL_TO_DNA_TEAM,
                 subject=subject,
                 body=body
@@ -148,4 +221,6 @@ class EmailService:
             
         except Exception as e:
             logger.exception(f"❌ Failed to send job notification: {str(e)}")
-            return False
\ No newline at end of file
+            failed: "Future[bool]" = Future()
+            failed.set_result(False)
+            return failed
\ No newline at end of file
@@ -3,10 +3,9 @@ ETL service for the Spark application.
 Handles the specific Control M POC ETL operation.
 """
 from typing import Optional, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from loguru import logger
-from pyspark.sql.functions import lit
-from utils.db_utils import RedshiftConnector
+from utils.db_utils import RedshiftConnector, get_redshift_connector
 
 class ETLService:
     """Enhanced ETL service for Control M POC operations."""
@@ -14,9 +13,13 @@ class ETLService:
     def __init__(self, spark):
         """Initialize ETL service."""
         self.spark = spark
-        self.redshift = RedshiftConnector(spark, connection_type="poc")
         logger.info("🔧 ETL Service (Control M POC) initialized")
     
+    @property
+    def redshift(self) -> RedshiftConnector:
+        """POC connector, created on first use and shared across services."""
+        return get_redshift_connector(self.spark, "poc")
+    
     def run_control_m_poc_etl(self, load_date: Optional[str] = None, 
                              limit: int = 10) -> Dict[str, Any]:
         """
@@ -29,43 +32,45 @@ class ETLService:
         Returns:
             Job execution results
         """
+        start_time = datetime.now()
+        
         try:
+            # Messages use loguru's deferred "{}" formatting so suppressed levels cost nothing
             logger.info("🚀 Starting Control M POC ETL")
-            start_time = datetime.now()
             
             if not load_date:
-                load_date = datetime.now().strftime("%Y-%m-%d")
+                load_date = date.today().isoformat()
             
-            logger.info(f"📅 Load date: {load_date}")
-            logger.info(f"🔢 Row limit: {limit}")
+            logger.info("📅 Load date: {}", load_date)
+            logger.info("🔢 Row limit: {}", limit)
             
-            # Read source data
+            # Read source data; projection, load_date and limit are pushed down to Redshift
             source_table = "dna_actln_dwh.vw_patients_opsumit_cap"
-            logger.info(f"📖 Reading from {source_table}")
-            
-            df = self.redshift.read_table(
-                table_name="vw_patients_opsumit_cap",
-                schema="dna_actln_dwh",
-                limit=limit
-            )
+            logger.info("📖 Reading from {}", source_table)
             
-            # Add load_date column
-            df = df.withColumn("load_date", lit(load_date))
+            # Validate before embedding in SQL
+            datetime.strptime(load_date, "%Y-%m-%d")
             
-            # Select required columns
-            required_columns = ["load_date", "product", "ac_number", "referral_date"]
-            df = df.select(*required_columns)
+            source_query = (
+                f"SELECT CAST('{load_date}' AS VARCHAR(10)) AS load_date, product, ac_number, referral_date "
+                f"FROM {source_table}"
+            )
+            if limit and limit > 0:
+                source_query += f" LIMIT {int(limit)}"
             
-            logger.info("📋 Sample transformed data:")
-            df.show(5, truncate=False)
+            df = self.redshift.execute_sql(source_query)
             
-            row_count = df.count()
+            # Five-row sample, fetched and rendered only when a DEBUG sink is active
+            logger.opt(lazy=True).debug(
+                "📋 Sample transformed data:\n{}", lambda: "\n".join(map(str, df.limit(5).collect()))
+            )
             
             # Write to destination
             dest_table = "dna_actln_dwh.ControlM_New_test"
-            logger.info(f"📝 Writing to {dest_table}")
+            logger.info("📝 Writing to {}", dest_table)
             
-            self.redshift.write_table(
+            # write_table reports the rows it wrote without an extra Spark action
+            row_count = self.redshift.write_table(
                 df=df,
                 table_name="ControlM_New_test",
                 schema="dna_actln_dwh",
@@ -76,8 +81,8 @@ class ETLService:
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
-            logger.info(f"✅ Control M POC ETL completed successfully!")
-            logger.info(f"📊 Processed {row_count:,} rows in {duration:.2f} seconds")
+            logger.info("✅ Control M POC ETL completed successfully!")
+            logger.info("📊 Processed {:,} rows in {:.2f} seconds", row_count, duration)
             
             return {
                 "status": "Success",
@@ -95,12 +100,12 @@ class ETLService:
             logger.exception(f"❌ Control M POC ETL failed: {str(e)}")
             
             end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds() if 'start_time' in locals() else 0
+            duration = (end_time - start_time).total_seconds()
             
             return {
                 "status": "Failed",
                 "error": str(e),
-                "start_time": locals().get('start_time', datetime.now()),
+                "start_time": start_time,
                 "end_time": end_time,
                 "duration_seconds": duration
             }
\ No newline at end of file
@@ -1,15 +1,37 @@
 """
 Enhanced JCAP PA ETL service with full production features.
 """
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, Optional, Tuple
+from datetime import date, datetime
 from loguru import logger
+from pyspark import StorageLevel
 from pyspark.sql.functions import col, to_timestamp, lit
-from utils.db_utils import RedshiftConnector
+from utils.db_utils import RedshiftConnector, get_redshift_connector
 from services.s3_service import S3Service
 from services.email_service import EmailService
 from core.config import get_settings
 
+# Date columns converted to timestamps, keyed by lowercase name (Redshift returns
+# lowercase identifiers, and withColumn matched them case-insensitively)
+DATE_COLUMNS = {
+    name.lower(): name
+    for name in ("load_date", "PA_CompletedDate", "Overall_date",
+                 "appeal_completedate", "JCAP_table_loaddate")
+}
+
+# Rename remaining columns to match target schema
+COLUMN_MAPPING = {
+    "DrugorTherapy": "drugortherapy",
+    "PADisposition": "padisposition", 
+    "AppealDisposition": "appealdisposition",
+    "FEREquired": "ferequired",
+    "rx_PlanName": "rx_planname",
+    "rx_PayerName": "rx_payername", 
+    "rx_PayerType": "rx_payertype",
+    "LHM_Name": "lhm_name",
+    "REFERRING_HCP_PATH_STATE": "referring_hcp_path_state"
+}
+
 class JcapPaEtlService:
     """
     Production JCAP PA ETL service with comprehensive workflow management.
@@ -20,9 +42,7 @@ class JcapPaEtlService:
         self.spark = spark
         self.settings = get_settings()
         
-        # Initialize connectors for different environments
-        self.cdp_connector = RedshiftConnector(spark, connection_type="cdp")
-        self.jcap_connector = RedshiftConnector(spark, connection_type="jcap")
+        # Redshift connectors are created on first use (see properties below)
         self.s3_service = S3Service(spark)
         self.email_service = EmailService()
         
@@ -31,20 +51,33 @@ class JcapPaEtlService:
         self.backup_table = "pah_jcap_pa_bkp"
         self.schema = self.settings.JCAP_REDSHIFT_SCHEMA
         self.s3_path = f"s3://{self.settings.S3_BUCKET}/jcap_pa_dashboard/"
+        self.extract_s3_path = f"s3://{self.settings.S3_BUCKET}/jcap_pa_extract/"
         
         logger.info("🏭 JCAP PA ETL Service initialized (Production)")
-        logger.info(f"📋 CDP Source: {self.cdp_connector.connection_type}")
-        logger.info(f"📋 JCAP Destination: {self.jcap_connector.connection_type}")
+        logger.info("📋 CDP Source: cdp")
+        logger.info("📋 JCAP Destination: jcap")
         logger.info(f"💾 S3 Staging: {self.s3_path}")
     
+    @property
+    def cdp_connector(self) -> RedshiftConnector:
+        """CDP source connector, shared across services."""
+        return get_redshift_connector(self.spark, "cdp")
+    
+    @property
+    def jcap_connector(self) -> RedshiftConnector:
+        """JCAP destination connector, shared across services."""
+        return get_redshift_connector(self.spark, "jcap")
+    
     def run_jcap_pa_etl(self, load_date: Optional[str] = None) -> Dict[str, Any]:
         """Execute complete JCAP PA ETL workflow."""
+        df = df_transformed = None
+        start_time = datetime.now()
+        
         try:
             logger.info("🚀 Starting JCAP PA ETL (Production Workflow)")
-            start_time = datetime.now()
             
             if not load_date:
-                load_date = datetime.now().strftime("%Y-%m-%d")
+                load_date = date.today().isoformat()
             
             logger.info(f"📅 Load date: {load_date}")
             
@@ -60,17 +93,23 @@ class JcapPaEtlService:
             logger.info("3️⃣ Transforming data")
             df_transformed = self._transform_data(df)
             
-            # Step 4: Stage to S3
+            # COPY from Parquet maps columns by position, so stage in the destination's column order
+            df_transformed, copy_compatible = self._align_to_destination(df_transformed)
+            
+            # Staging, loading and validation all consume the transformed data;
+            # the first action (S3 staging) materializes it once for the rest
+            df_transformed = df_transformed.persist(StorageLevel.MEMORY_AND_DISK)
+            
+            # Step 4: Stage to S3; the destination is untouched until staging succeeds
             logger.info("4️⃣ Staging data to S3")
             self._stage_to_s3(df_transformed)
 
-            # Step 5: Load to destination (FIXED)
+            # Step 5: Replace the destination contents (restored from backup on failure)
             logger.info("5️⃣ Loading to destination")
-            self._load_to_destination(df_transformed)
+            current_count = self._load_to_destination(df_transformed, copy_compatible)
             
-            # Step 6: Validate and alert
+            # Step 6: Validate and alert (using the count verified by the load)
             logger.info("6️⃣ Validating results")
-            current_count = self.jcap_connector.get_table_count(self.main_table, self.schema)
             variance_result = self._validate_and_alert(previous_count, current_count)
             
             # Calculate final metrics
@@ -110,7 +149,7 @@ class JcapPaEtlService:
             logger.exception(f"❌ JCAP PA ETL failed: {str(e)}")
             
             end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds() if 'start_time' in locals() else 0
+            duration = (end_time - start_time).total_seconds()
             
             # Send failure notification
             self.email_service.send_job_completion_notification(
@@ -123,43 +162,48 @@ class JcapPaEtlService:
             return {
                 "status": "Failed",
                 "error": str(e),
-                "start_time": locals().get('start_time', datetime.now()),
+                "start_time": start_time,
                 "end_time": end_time,
                 "duration_seconds": duration
             }
+        
+        finally:
+            # Release cached extract/transform data whatever the outcome
+            for cached_df in (df, df_transformed):
+                if cached_df is not None:
+                    cached_df.unpersist()
     
     def _create_and_validate_backup(self) -> int:
-        """FIXED: Create backup with comprehensive validation using corrected methods."""
+        """Refresh the backup table inside Redshift and validate it against the main table."""
+        # Validated, quoted names for SQL; get_table_counts keys its results by "schema.table"
+        main_table = self.jcap_connector.qualify(self.schema, self.main_table)
+        backup_table = self.jcap_connector.qualify(self.schema, self.backup_table)
+        main_key = f"{self.schema}.{self.main_table}"
+        backup_key = f"{self.schema}.{self.backup_table}"
+        
         try:
-            # Truncate backup table using fixed method
-            logger.info("🗑️ Truncating backup table")
-            self.jcap_connector.truncate_table(self.backup_table, self.schema)
-            #logger.info("🗑️ Skip Truncating backup table")
+            # Server-side copy: rows never leave the cluster
+            logger.info(f"🔄 Refreshing backup {backup_table} from {main_table}")
+            self.jcap_connector.execute_statement(
+                f"TRUNCATE TABLE {backup_table}; "
+                f"INSERT INTO {backup_table} SELECT * FROM {main_table}"
+            )
             
-            # Get original count
-            original_count = self.jcap_connector.get_table_count(self.main_table, self.schema)
+            # Validate backup with both counts in one round-trip
+            counts = self.jcap_connector.get_table_counts(
+                [(self.schema, self.main_table), (self.schema, self.backup_table)]
+            )
+            original_count, backup_count = counts[main_key], counts[backup_key]
             logger.info(f"📊 Original count: {original_count:,}")
             
             if original_count == 0:
-                logger.warning("⚠️ Main table is empty - skipping backup")
+                logger.warning("⚠️ Main table is empty - backup is empty")
                 return 0
             
-            # Copy data to backup using fixed method
-            logger.info("🔄 Copying data to backup")
-            copied_rows = self.jcap_connector.copy_table_data(
-                source_table=self.main_table,
-                dest_table=self.backup_table,
-                source_schema=self.schema,
-                dest_schema=self.schema
-            )
-            
-            # Validate backup
-            backup_count = self.jcap_connector.get_table_count(self.backup_table, self.schema)
-            
             if original_count != backup_count:
                 raise RuntimeError(
                     f"Backup validation failed: Original={original_count:,}, "
-                    f"Backup={backup_count:,}, Copied={copied_rows:,}"
+                    f"Backup={backup_count:,}"
                 )
             
             logger.info(f"✅ Backup created and validated: {backup_count:,} rows")
@@ -173,20 +217,23 @@ class JcapPaEtlService:
         """Extract data from CDP with optimized query."""
         try:
             # Enhanced CDP query with PROPER Redshift syntax
+            # The joins run inside Redshift, which has no join hints. The alignment (C) and
+            # segment (S) dimensions are small and should be DISTSTYLE ALL so these joins
+            # stay DS_DIST_NONE instead of redistributing the payer-details fact rows.
             cdp_query = """
             SELECT  CURRENT_DATE::date AS JCAP_table_loaddate,
                     p.pmc_patid::varchar  as pmc_patid,
                     U.managing_hcp_state AS VREFERRING_HCP_PATH_STATE,
                     P.prod_nm AS DrugorTherapy,
-                    pa_completed_date::date AS PA_CompletedDate,
+                    P.pa_completed_date::date AS PA_CompletedDate,
                     p.pa_disposition AS PADisposition,
-                    appeal_complete_date::date AS appeal_completedate,
+                    P.appeal_complete_date::date AS appeal_completedate,
                     P.appeal_disposition AS AppealDisposition,
-                    case when appeal_complete_date > pa_completed_date then appeal_complete_date else pa_completed_date end as Overall_date,
+                    case when P.appeal_complete_date > P.pa_completed_date then P.appeal_complete_date else P.pa_completed_date end as Overall_date,
                     case 
-                    when pa_disposition='Approved' then 'Approved'
-                    when pa_disposition='Denied' and appeal_disposition = 'Approved' then 'Approved'
-                    when pa_disposition='Denied' then 'Denied' END as Final_PA_Disposition,
+                    when P.pa_disposition='Approved' then 'Approved'
+                    when P.pa_disposition='Denied' and P.appeal_disposition = 'Approved' then 'Approved'
+                    when P.pa_disposition='Denied' then 'Denied' END as Final_PA_Disposition,
                     P.fe_required AS FEREquired,
                     P.rx_planname AS rx_PlanName,
                     P.rx_payername AS rx_PayerName,
@@ -198,12 +245,7 @@ class JcapPaEtlService:
                     C.lhm_name,
                     c.bd_terrname AS region,
                     S.dynamic_segment AS segment
-                FROM   (SELECT *          
-                        FROM   cdp.fct_pah_pa_payer_details
-                        WHERE  Upper(prod_nm) IN ( 'OPSUMIT', 'UPTRAVI', 'OPSYNVI' )
-                            AND Upper(pa_disposition) IN ( 'APPROVED', 'DENIED' )
-                            AND pa_completed_date >= '01/01/2020'
-                            AND pa_completed_date <= CURRENT_DATE ) P
+                FROM   cdp.fct_pah_pa_payer_details P
                     LEFT JOIN 
                     (SELECT DISTINCT pmc_patid,
                                         prod_nm,
@@ -213,28 +255,47 @@ class JcapPaEtlService:
                                 FROM   cdp.fct_pah_ref_cap_dly) AS U
                             ON P.pmc_patid = U.pmc_patid
                                 AND Upper(P.prod_nm) = Upper(U.prod_nm)
-                    LEFT JOIN 
-                    (SELECT * FROM   cdp.dmn_pah_curr_alignment_all) AS C
+                    LEFT JOIN cdp.dmn_pah_curr_alignment_all C
                             ON U.managing_hcp_zip = C.zip
-                    LEFT JOIN 
-                    (SELECT jnj_id,
-                            dynamic_segment
-                                FROM   cdp.dmn_pah_segment
-                                WHERE  actv_flag = '1') S
+                    LEFT JOIN cdp.dmn_pah_segment S
                             ON U.managing_hcp_jnj_id = S.jnj_id
+                                AND S.actv_flag = '1'
+                WHERE  Upper(P.prod_nm) IN ( 'OPSUMIT', 'UPTRAVI', 'OPSYNVI' )
+                    AND Upper(P.pa_disposition) IN ( 'APPROVED', 'DENIED' )
+                    AND P.pa_completed_date >= '01/01/2020'
+                    AND P.pa_completed_date <= CURRENT_DATE
                             
                 order by drugortherapy,pmc_patid
             """
             
-            logger.info("🔍 Executing CDP extraction query")
-            df = self.cdp_connector.execute_sql(cdp_query)
+            # Method 1: UNLOAD from every Redshift slice to S3 and read the Parquet back
+            try:
+                if not self.settings.S3_IAM_ROLE:
+                    raise ValueError("S3_IAM_ROLE is not configured")
+                
+                logger.info("🔍 Unloading CDP extraction query to S3")
+                self.cdp_connector.unload_query(
+                    sql_query=cdp_query,
+                    s3_path=self.extract_s3_path,
+                    iam_role=self.settings.S3_IAM_ROLE
+                )
+                df = self.s3_service.read_parquet(self.extract_s3_path)
+                
+            except Exception as unload_error:
+                logger.warning(f"⚠️ UNLOAD extract failed, falling back to Spark JDBC: {unload_error}")
+                
+                # Method 2: Pull the result through a single JDBC connection
+                logger.info("🔍 Executing CDP extraction query")
+                # Cached: counted below and read again when the transform is materialized
+                df = self.cdp_connector.execute_sql(cdp_query, cache=True)
             
             row_count = df.count()
             logger.info(f"📊 Extracted {row_count:,} rows from CDP")
             
-            # Show sample data
-            logger.info("📋 Sample extracted data:")
-            df.show(5, truncate=False)
+            # Five-row sample, fetched and rendered only when a DEBUG sink is active
+            logger.opt(lazy=True).debug(
+                "📋 Sample extracted data:\n{}", lambda: "\n".join(map(str, df.limit(5).collect()))
+            )
             
             return df
             
@@ -247,48 +308,22 @@ class JcapPaEtlService:
         try:
             logger.info("🔄 Transforming data types and formats")
             
-            # Transform date columns with proper error handling
-            # df_transformed = (df
-            #     .withColumn("load_date", to_timestamp(col("load_date"), "MM-dd-yyyy"))
-            #     .withColumn("PA_CompletedDate", to_timestamp(col("PA_CompletedDate"), "MM-dd-yyyy"))
-            #     .withColumn("PA_InitiatedDate", to_timestamp(col("PA_InitiatedDate"), "MM-dd-yyyy"))
-            #     .withColumn("JCAP_table_loaddate", to_timestamp(col("JCAP_table_loaddate"), "MM-dd-yyyy"))
-            #     .drop("PA_CompletedDate", "PA_InitiatedDate", "JCAP_table_loaddate")  # Remove originals
-            # )
-            
-            df =df.withColumn("load_date", to_timestamp(col("load_date"), "MM-dd-yyyy"))
-            df =df.withColumn("PA_CompletedDate", to_timestamp(col("PA_CompletedDate"), "MM-dd-yyyy"))
-            #df =df.withColumn("PA_InitiatedDate", to_timestamp(col("PA_InitiatedDate"), "MM-dd-yyyy"))
-            df =df.withColumn("Overall_date", to_timestamp(col("Overall_date"), "MM-dd-yyyy"))
-            df =df.withColumn("appeal_completedate", to_timestamp(col("appeal_completedate"), "MM-dd-yyyy"))
-            df =df.withColumn("JCAP_table_loaddate", to_timestamp(col("JCAP_table_loaddate"), "MM-dd-yyyy"))
-            df.dtypes
-
-            df_transformed = df
-
-
-            # Rename remaining columns to match target schema
-            column_mapping = {
-                "DrugorTherapy": "drugortherapy",
-                "PADisposition": "padisposition", 
-                "AppealDisposition": "appealdisposition",
-                "FEREquired": "ferequired",
-                "rx_PlanName": "rx_planname",
-                "rx_PayerName": "rx_payername", 
-                "rx_PayerType": "rx_payertype",
-                "LHM_Name": "lhm_name",
-                "REFERRING_HCP_PATH_STATE": "referring_hcp_path_state"
-            }
+            # One projection for all conversions and renames, keeping column order
+            exprs = []
+            for column in df.columns:
+                if column.lower() in DATE_COLUMNS:
+                    exprs.append(to_timestamp(col(column), "MM-dd-yyyy").alias(DATE_COLUMNS[column.lower()]))
+                elif column in COLUMN_MAPPING:
+                    exprs.append(col(column).alias(COLUMN_MAPPING[column]))
+                else:
+                    exprs.append(col(column))
             
-            # Apply column name transformations
-            for old_col, new_col in column_mapping.items():
-                if old_col in df_transformed.columns:
-                    df_transformed = df_transformed.withColumnRenamed(old_col, new_col)
+            df_transformed = df.select(*exprs)
             
-            # Log schema information
-            logger.info("📋 Transformed schema:")
-            for field in df_transformed.schema.fields:
-                logger.info(f"  {field.name}: {field.dataType}")
+            # Schema is only resolved and stringified when a DEBUG sink is active
+            logger.opt(lazy=True).debug(
+                "📋 Transformed schema: {}", lambda: df_transformed.schema.simpleString()
+            )
             
             return df_transformed
             
@@ -296,6 +331,23 @@ class JcapPaEtlService:
             logger.exception(f"❌ Data transformation failed: {str(e)}")
             raise RuntimeError(f"Data transformation failed: {str(e)}") from e
     
+    def _align_to_destination(self, df) -> Tuple[Any, bool]:
+        """
+        Reorder df's columns to the destination table's ordinal order.
+        Returns (df, True) when the column sets match, else (df unchanged, False) so the load uses JDBC.
+        """
+        try:
+            aligned = self.jcap_connector.align_for_copy(df, self.main_table, self.schema)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read destination columns, COPY disabled: {str(e)}")
+            return df, False
+        
+        if aligned is None:
+            logger.warning(f"⚠️ Columns differ from {self.schema}.{self.main_table}, COPY disabled")
+            return df, False
+        
+        return aligned, True
+    
     def _stage_to_s3(self, df):
         """Stage data to S3 with optimizations."""
         try:
@@ -310,7 +362,10 @@ class JcapPaEtlService:
             self.s3_service.write_parquet(
                 df=df,
                 s3_path=self.s3_path,
-                mode='overwrite'
+                mode='overwrite',
+                num_files=self.settings.S3_STAGE_FILES,
+                # Staged files are only read by Redshift COPY, whose Parquet reader expects Snappy
+                compression='snappy'
             )
             
             logger.info("✅ Data staged to S3 successfully")
@@ -319,24 +374,69 @@ class JcapPaEtlService:
             logger.exception(f"❌ S3 staging failed: {str(e)}")
             raise RuntimeError(f"S3 staging failed: {str(e)}") from e
     
-    def _load_to_destination(self, df_transformed):
-        """FIXED: Load data using direct Spark JDBC write - exactly like notebook."""
+    def _restore_from_backup(self) -> None:
+        """Replace whatever the failed load left in the main table with the validated backup."""
+        main_table = self.jcap_connector.qualify(self.schema, self.main_table)
+        backup_table = self.jcap_connector.qualify(self.schema, self.backup_table)
+        
         try:
-            # Truncate main table using fixed method
-            logger.info("🗑️ Truncating destination table")
-            self.jcap_connector.truncate_table(self.main_table, self.schema)
-            
-            # Get row count before write
-            row_count = df_transformed.count()
-            logger.info(f"📥 Loading {row_count:,} rows using direct Spark JDBC")
-            
-            # FIXED: Direct write using Spark JDBC - exactly like notebook
-            self.jcap_connector.write_table(
-                df=df_transformed,
-                table_name=self.main_table,
-                schema=self.schema,
-                mode="append"  # Table is already truncated
+            logger.warning(f"♻️ Restoring {main_table} from {backup_table}")
+            # One transaction: partially loaded rows go and backup rows arrive together
+            restored = self.jcap_connector.execute_ddls(
+                [f"DELETE FROM {main_table}", f"INSERT INTO {main_table} SELECT * FROM {backup_table}"],
+                atomic=True
             )
+            logger.info(f"✅ Restored {restored:,} rows to {main_table}")
+        except Exception as e:
+            logger.exception(f"❌ Restore from backup failed: {str(e)}")
+    
+    def _load_to_destination(self, df_transformed, copy_compatible: bool = True) -> int:
+        """
+        Replace the destination contents with the staged S3 data using COPY, falling back to Spark JDBC.
+        
+        The COPY path deletes and loads the staged part files (through a manifest) in one
+        transaction, so a failed COPY changes nothing. It needs copy_compatible, i.e. staged
+        columns in the destination's order (see _align_to_destination).
+        Once the destination has been modified, any later failure restores it from the backup.
+        Returns the verified destination row count.
+        """
+        destination_modified = False
+        try:
+            # Method 1: DELETE + COPY of the Parquet files already staged by _stage_to_s3
+            try:
+                if not self.settings.S3_IAM_ROLE:
+                    raise ValueError("S3_IAM_ROLE is not configured")
+                if not copy_compatible:
+                    raise ValueError("staged columns do not match the destination table")
+                
+                self.jcap_connector.copy_from_s3(
+                    table_name=self.main_table,
+                    s3_path=self.jcap_connector.write_copy_manifest(self.s3_path),
+                    iam_role=self.settings.S3_IAM_ROLE,
+                    schema=self.schema,
+                    manifest=True,
+                    replace=True
+                )
+                destination_modified = True
+                # Served from the persisted DataFrame, not a new extract
+                row_count = df_transformed.count()
+                
+            except Exception as copy_error:
+                if destination_modified:
+                    raise
+                logger.warning(f"⚠️ COPY load failed, falling back to direct Spark JDBC: {copy_error}")
+                
+                # Method 2: Direct write using Spark JDBC - exactly like notebook.
+                # JDBC writes are not transactional, so the table is emptied first
+                destination_modified = True
+                self.jcap_connector.truncate_table(self.main_table, self.schema)
+                # write_table returns the row count it already computes, so no separate count action
+                row_count = self.jcap_connector.write_table(
+                    df=df_transformed,
+                    table_name=self.main_table,
+                    schema=self.schema,
+                    mode="append"
+                )
             
             # Verify the load
             final_count = self.jcap_connector.get_table_count(self.main_table, self.schema)
@@ -349,9 +449,12 @@ class JcapPaEtlService:
                 logger.warning(f"⚠️ Row count mismatch: Expected {row_count:,}, Got {final_count:,}")
             
             logger.info("✅ Data loaded to destination successfully")
+            return final_count
             
         except Exception as e:
             logger.exception(f"❌ Destination load failed: {str(e)}")
+            if destination_modified:
+                self._restore_from_backup()
             raise RuntimeError(f"Destination load failed: {str(e)}") from e
     
     def _validate_and_alert(self, previous_count: int, current_count: int) -> Dict[str, Any]:
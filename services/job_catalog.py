@@ -0,0 +1,28 @@
+"""
+Static job catalog for the Spark application.
+Kept free of PySpark, pydantic and loguru imports so the CLI can list and
+validate job types without loading them.
+"""
+from typing import Dict
+
+JOB_TYPES = {
+    "control_m_poc_etl": {
+        "method": "run_control_m_poc_etl",
+        "description": "Control M POC ETL - Development/testing with row limits and append mode",
+        "parameters": ["load_date", "limit"],
+        "environment": "POC"
+    },
+    "jcap_pa_etl": {
+        "method": "run_jcap_pa_etl",
+        "description": "JCAP PA ETL - Production workflow with backup/restore, variance validation, and alerts",
+        "parameters": ["load_date"],
+        "environment": "Production"
+    }
+}
+
+def list_supported_job_types() -> Dict[str, str]:
+    """Get supported job types with descriptions."""
+    return {
+        job_type: f"[{config['environment']}] {config['description']}"
+        for job_type, config in JOB_TYPES.items()
+    }
@@ -2,53 +2,77 @@
 Job service for the Spark application.
 Handles job orchestration and execution.
 """
+import inspect
+from collections import namedtuple
 from typing import Dict, Any, List
 from datetime import datetime
 from loguru import logger
-from services.etl_service import ETLService
-from services.jcap_pa_etl_service import JcapPaEtlService
+
+from services.job_catalog import JOB_TYPES, list_supported_job_types
+
+# Resolved dispatch entry for one job type; fields are read as attributes on every execute_job
+JobSpec = namedtuple("JobSpec", "method callable param_keys environment description")
 
 class JobService:
     """Enhanced job orchestration service."""
     
+    __slots__ = ("spark", "settings", "_validated_job_types", "etl_service",
+                 "jcap_pa_etl_service", "supported_job_types")
+    
+    # Static job catalog - available without a Spark session
+    JOB_TYPES = JOB_TYPES
+    
     def __init__(self, spark):
-        """Initialize job service with all ETL services."""
+        """
+        Initialize job service with all ETL services.
+        
+        The given session is shared by every service and reused for every run in
+        continuous mode; services must never build their own SparkSession.
+        """
+        # Import here so the job catalog can be listed without loading PySpark
+        from services.etl_service import ETLService
+        from services.jcap_pa_etl_service import JcapPaEtlService
+        from core.config import get_settings
+        
         self.spark = spark
+        self.settings = get_settings()
+        
+        # Job types whose settings have already passed validation
+        self._validated_job_types = set()
         
         # Initialize ETL services
         self.etl_service = ETLService(spark)
         self.jcap_pa_etl_service = JcapPaEtlService(spark)
         
-        # Define supported job types
-        self.supported_job_types = {
-            "control_m_poc_etl": {
-                "service": self.etl_service,
-                "method": "run_control_m_poc_etl",
-                "description": "Control M POC ETL - Development/testing with row limits and append mode",
-                "parameters": ["load_date", "limit"],
-                "environment": "POC"
-            },
-            "jcap_pa_etl": {
-                "service": self.jcap_pa_etl_service,
-                "method": "run_jcap_pa_etl",
-                "description": "JCAP PA ETL - Production workflow with backup/restore, variance validation, and alerts",
-                "parameters": ["load_date"],
-                "environment": "Production"
-            }
+        # Bind supported job types to their service instances
+        services = {
+            "control_m_poc_etl": self.etl_service,
+            "jcap_pa_etl": self.jcap_pa_etl_service
         }
+        # Resolve each entry point once so dispatch is a dict lookup plus call
+        self.supported_job_types = {}
+        for job_type, config in self.JOB_TYPES.items():
+            method = getattr(services[job_type], config["method"])
+            # Keep only catalog parameters the method signature really accepts
+            accepted = inspect.signature(method).parameters
+            self.supported_job_types[job_type] = JobSpec(
+                method=config["method"],
+                callable=method,
+                param_keys=tuple(key for key in config["parameters"] if key in accepted),
+                environment=config["environment"],
+                description=config["description"]
+            )
         
         logger.info("🎛️  Job Service initialized")
         logger.info(f"📋 Supported job types: {len(self.supported_job_types)}")
         
-        for job_type, config in self.supported_job_types.items():
-            logger.info(f"  🔧 {job_type} ({config['environment']}): {config['description']}")
+        for job_type, spec in self.supported_job_types.items():
+            logger.info(f"  🔧 {job_type} ({spec.environment}): {spec.description}")
     
-    def list_supported_job_types(self) -> Dict[str, str]:
+    @classmethod
+    def list_supported_job_types(cls) -> Dict[str, str]:
         """Get supported job types with descriptions."""
-        return {
-            job_type: f"[{config['environment']}] {config['description']}"
-            for job_type, config in self.supported_job_types.items()
-        }
+        return list_supported_job_types()
     
     def execute_job(self, job_config: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -68,43 +92,40 @@ class JobService:
             logger.error(f"❌ {error_msg}")
             return self._create_error_result(job_id, job_name, job_type, error_msg)
         
-        # Validate configuration for specific job type
-        try:
-            from core.config import get_settings
-            settings = get_settings()
-            settings.validate_for_job_type(job_type)
-            logger.info(f"✅ Configuration validated for job type: {job_type}")
-        except ValueError as e:
-            error_msg = f"Configuration validation failed: {str(e)}"
-            logger.error(f"❌ {error_msg}")
-            return self._create_error_result(job_id, job_name, job_type, error_msg)
+        # Validate configuration for specific job type (once per job type)
+        if job_type not in self._validated_job_types:
+            try:
+                self.settings.validate_for_job_type(job_type)
+                self._validated_job_types.add(job_type)
+                logger.info(f"✅ Configuration validated for job type: {job_type}")
+            except ValueError as e:
+                error_msg = f"Configuration validation failed: {str(e)}"
+                logger.error(f"❌ {error_msg}")
+                return self._create_error_result(job_id, job_name, job_type, error_msg)
         
         start_time = datetime.now()
         
         try:
             # Get job configuration
-            job_info = self.supported_job_types[job_type]
-            service = job_info["service"]
-            method_name = job_info["method"]
+            job_spec = self.supported_job_types[job_type]
+            
+            logger.info(f"📋 Job: {job_spec.description}")
+            logger.info(f"🌍 Environment: {job_spec.environment}")
             
-            logger.info(f"📋 Job: {job_info['description']}")
-            logger.info(f"🌍 Environment: {job_info['environment']}")
+            # Pass only the declared parameters the job config provides; the
+            # service method's own defaults cover the rest
+            kwargs = {key: job_config[key] for key in job_spec.param_keys if key in job_config}
+            logger.info(f"🔧 {job_spec.method} parameters: {kwargs}")
             
-            # Execute specific job type
-            if job_type == "control_m_poc_etl":
-                result = self._execute_control_m_poc_etl(service, method_name, job_config)
-            elif job_type == "jcap_pa_etl":
-                result = self._execute_jcap_pa_etl(service, method_name, job_config)
-            else:
-                result = self._execute_generic_job(service, method_name, job_config)
+            result = job_spec.callable(**kwargs)
             
             # Enhance result with job metadata
             result.update({
                 "job_id": job_id,
                 "job_name": job_name,
                 "job_type": job_type,
-                "job_description": job_info["description"],
-                "environment": job_info["environment"]
+                "job_description": job_spec.description,
+                "environment": job_spec.environment
             })
             
             # Log results
@@ -123,46 +144,6 @@ class JobService:
                 start_time=start_time, end_time=end_time, duration=duration
             )
     
-    def _execute_control_m_poc_etl(self, service, method_name: str, 
-                                  job_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute Control M POC ETL with parameter extraction."""
-        load_date = job_config.get("load_date")
-        limit = job_config.get("limit", 10)
-        
-        logger.info(f"🔧 Control M POC ETL parameters: load_date={load_date}, limit={limit}")
-        
-        method = getattr(service, method_name)
-        return method(load_date=load_date, limit=limit)
-    
-    def _execute_jcap_pa_etl(self, service, method_name: str, 
-                            job_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute JCAP PA ETL with parameter extraction."""
-        load_date = job_config.get("load_date")
-        
-        logger.info(f"🏭 JCAP PA ETL parameters: load_date={load_date}")
-        
-        method = getattr(service, method_name)
-        return method(load_date=load_date)
-    
-    def _execute_generic_job(self, service, method_name: str, 
-                           job_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute generic job with dynamic parameter handling."""
-        logger.info(f"🔧 Executing generic job: {method_name}")
-        
-        method = getattr(service, method_name)
-        
-        # Try different parameter combinations
-        try:
-            return method(
-                load_date=job_config.get("load_date"),
-                limit=job_config.get("limit", 10)
-            )
-        except TypeError:
-            try:
-                return method(load_date=job_config.get("load_date"))
-            except TypeError:
-                return method()
-    
     def _log_job_result(self, result: Dict[str, Any]) -> None:
         """Log job execution results with detailed metrics."""
         status = result.get("status", "Unknown")
@@ -18,30 +18,38 @@ class S3Service:
         logger.info(f"🪣 S3 Bucket: {self.settings.S3_BUCKET}")
     
     def get_s3_path(self, path_suffix: str) -> str:
-        """Construct full S3 path using configured bucket."""
+        """Construct full s3a:// path; full s3:// or s3a:// URIs are normalized to s3a://."""
+        if path_suffix.startswith("s3a://"):
+            return path_suffix
+        if path_suffix.startswith("s3://"):
+            return "s3a://" + path_suffix[len("s3://"):]
         if path_suffix.startswith('/'):
             path_suffix = path_suffix[1:]
         return f"s3a://{self.settings.S3_BUCKET}/{path_suffix}"
     
-    def write_parquet(self, df: DataFrame, s3_path: str, mode: str = "overwrite") -> str:
-        """Write DataFrame to S3 - exactly like notebook."""
+    def write_parquet(self, df: DataFrame, s3_path: str, mode: str = "overwrite",
+                      num_files: Optional[int] = None, compression: str = "zstd") -> str:
+        """Write DataFrame to S3 as Parquet (ZSTD level 3 by default), optionally as a fixed number of files."""
         try:
-            row_count = df.count()
+            # Spread rows over several files so readers (e.g. Redshift COPY) can load in parallel.
+            # Merging partitions needs no shuffle; only splitting does.
+            if num_files:
+                if df.rdd.getNumPartitions() > num_files:
+                    df = df.coalesce(num_files)
+                else:
+                    df = df.repartition(num_files)
             
-            # Handle path construction
-            if s3_path.startswith("s3://") or s3_path.startswith("s3a://"):
-                if s3_path.startswith("s3://"):
-                    s3_path = s3_path.replace("s3://", "s3a://")
-                final_path = s3_path
-            else:
-                final_path = self.get_s3_path(s3_path)
+            final_path = self.get_s3_path(s3_path)
             
-            logger.info(f"💾 Writing {row_count:,} rows to S3: {final_path}")
+            logger.info(f"💾 Writing to S3: {final_path}")
             
             # Exact same as notebook - no extra configuration
             source_conf = {
-                "ServerSideEncryption": "AES256"
+                "ServerSideEncryption": "AES256",
+                "compression": compression
             }
+            if compression == "zstd":
+                source_conf["parquet.compression.codec.zstd.level"] = "3"
             
             # Direct write - exactly like your notebook
             df.write.options(**source_conf).mode(mode).format('parquet').save(final_path)
@@ -56,20 +64,14 @@ class S3Service:
     def read_parquet(self, s3_path: str) -> DataFrame:
         """Read Parquet data from S3."""
         try:
-            # Handle path construction
-            if s3_path.startswith("s3://") or s3_path.startswith("s3a://"):
-                if s3_path.startswith("s3://"):
-                    s3_path = s3_path.replace("s3://", "s3a://")
-                final_path = s3_path
-            else:
-                final_path = self.get_s3_path(s3_path)
+            final_path = self.get_s3_path(s3_path)
             
             logger.info(f"📖 Reading from S3: {final_path}")
             
+            # Lazy: the first action downstream does the scan, so no count here
             df = self.spark.read.format('parquet').load(final_path)
-            row_count = df.count()
             
-            logger.info(f"✅ Successfully read {row_count:,} rows from S3")
+            logger.info(f"✅ Prepared lazy read of {final_path}")
             return df
             
         except Exception as e:
@@ -79,17 +81,13 @@ class S3Service:
     def path_exists(self, s3_path: str) -> bool:
         """Check if S3 path exists."""
         try:
-            # Handle path construction
-            if s3_path.startswith("s3://") or s3_path.startswith("s3a://"):
-                if s3_path.startswith("s3://"):
-                    s3_path = s3_path.replace("s3://", "s3a://")
-                final_path = s3_path
-            else:
-                final_path = self.get_s3_path(s3_path)
+            final_path = self.get_s3_path(s3_path)
             
-            # Try to read schema to check existence
-            self.spark.read.format('parquet').load(final_path).schema
-            return True
+            # Ask the Hadoop FileSystem directly: one metadata request, no Spark job or footer reads
+            jvm = self.spark.sparkContext._jvm
+            hadoop_path = jvm.org.apache.hadoop.fs.Path(final_path)
+            fs = hadoop_path.getFileSystem(self.spark.sparkContext._jsc.hadoopConfiguration())
+            return fs.exists(hadoop_path)
         except Exception:
             return False
     
@@ -3,22 +3,50 @@ Database utilities for the Spark ETL application.
 Provides connector classes for interacting with Redshift using pure Spark operations.
 Optimized for production use with comprehensive error handling.
 """
-from typing import Optional, Union, List
+import json
+import re
+import threading
+import uuid
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional, Union, List, Dict, Tuple
 from loguru import logger
+from pyspark import StorageLevel
 from pyspark.sql import DataFrame
 from core.config import get_settings
 
+REDSHIFT_DRIVER = "com.amazon.redshift.jdbc42.Driver"
+
+# Plain unquoted Redshift identifier; anything else is rejected before it reaches SQL
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# Connectors with an open driver-side pool, closed together at shutdown
+_POOLED_CONNECTORS = set()
+
+# Below this many rows a single JDBC read beats UNLOAD's S3 round-trip (see read_table_unload)
+UNLOAD_MIN_ROWS = 1_000_000
+
 class RedshiftConnector:
     """
     Production-ready Redshift connector using pure Spark JDBC.
     """
     
+    __slots__ = ("spark", "settings", "connection_type", "jdbc_url", "connection_properties",
+                 "_reader_options", "_data_source", "_pool_lock", "_driver", "_java_props")
+    
     CONNECTION_TYPES = {
         "poc": "POC/Development",
         "cdp": "CDP Production Source", 
         "jcap": "JCAP Production Destination"
     }
     
+    # Settings attributes holding the URL, user and password for each connection type
+    CONNECTION_SETTINGS = {
+        "poc": ("REDSHIFT_JDBC_URL", "REDSHIFT_USER", "REDSHIFT_PASSWORD"),
+        "cdp": ("CDP_REDSHIFT_JDBC_URL", "CDP_REDSHIFT_USER", "CDP_REDSHIFT_PASSWORD"),
+        "jcap": ("JCAP_REDSHIFT_JDBC_URL", "JCAP_REDSHIFT_USER", "JCAP_REDSHIFT_PASSWORD")
+    }
+    
     def __init__(self, spark, connection_type: str = "poc"):
         """Initialize connector with specified connection type."""
         if connection_type not in self.CONNECTION_TYPES:
@@ -32,191 +60,651 @@ class RedshiftConnector:
         # Configure connection properties
         self._configure_connection()
         
+        # Driver-side connection pool for statements and scalar queries, built on first use
+        self._data_source = None
+        self._pool_lock = threading.Lock()
+        self._driver = self._java_props = None
+        
         logger.info(f"🔗 RedshiftConnector initialized")
         logger.info(f"📋 Type: {connection_type} ({self.CONNECTION_TYPES[connection_type]})")
     
+    @staticmethod
+    def qualify(schema: Optional[str], table: str) -> str:
+        """Validate schema and table names and return the quoted, fully qualified table name."""
+        parts = [schema, table] if schema else [table]
+        for part in parts:
+            if not IDENTIFIER_PATTERN.match(part):
+                raise ValueError(f"Invalid Redshift identifier: {part!r}")
+        return ".".join(f'"{part}"' for part in parts)
+    
     def _configure_connection(self) -> None:
-        """Configure connection properties based on type."""
-        if self.connection_type == "cdp":
-            self.jdbc_url = self.settings.CDP_REDSHIFT_JDBC_URL
-            self.connection_properties = {
-                "user": self.settings.CDP_REDSHIFT_USER,
-                "password": self.settings.CDP_REDSHIFT_PASSWORD,
-                "driver": "com.amazon.redshift.jdbc42.Driver",
-                "loginTimeout": "30",
-                "socketTimeout": "300"
-            }
-        elif self.connection_type == "jcap":
-            self.jdbc_url = self.settings.JCAP_REDSHIFT_JDBC_URL
-            self.connection_properties = {
-                "user": self.settings.JCAP_REDSHIFT_USER,
-                "password": self.settings.JCAP_REDSHIFT_PASSWORD,
-                "driver": "com.amazon.redshift.jdbc42.Driver",
-                "loginTimeout": "30",
-                "socketTimeout": "300"
-            }
-        else:  # poc
-            self.jdbc_url = self.settings.REDSHIFT_JDBC_URL
-            self.connection_properties = {
-                "user": self.settings.REDSHIFT_USER,
-                "password": self.settings.REDSHIFT_PASSWORD,
-                "driver": "com.amazon.redshift.jdbc42.Driver",
-                "loginTimeout": "30",
-                "socketTimeout": "300"
-            }
+        """Configure connection and reader properties based on type (built once per connector)."""
+        url_key, user_key, password_key = self.CONNECTION_SETTINGS[self.connection_type]
+        
+        self.jdbc_url = getattr(self.settings, url_key)
+        self.connection_properties = {
+            "user": getattr(self.settings, user_key),
+            "password": getattr(self.settings, password_key),
+            "driver": REDSHIFT_DRIVER,
+            "loginTimeout": "30",
+            "socketTimeout": "300"
+        }
+        
+        # Full option set for JDBC reads; fetchsize raised from the driver's 1000 cuts round-trips 10x
+        self._reader_options = {
+            "url": self.jdbc_url,
+            **self.connection_properties,
+            "fetchsize": str(self.settings.JDBC_FETCH_SIZE),
+            # Spark's default, pinned so filters applied after a read keep reaching Redshift
+            "pushDownPredicate": "true"
+        }
+    
+    def _jdbc_reader(self, source: str):
+        """
+        New JDBC DataFrameReader for a table or subquery.
+        DataFrameReader.option() mutates the reader, so one is built per read rather than shared across threads.
+        """
+        return self.spark.read.format("jdbc").options(**self._reader_options).option("dbtable", source)
     
     def read_table(self, table_name: str, schema: Optional[str] = None, 
-                   limit: Optional[int] = None) -> DataFrame:
-        """Read data from Redshift table with optimizations."""
-        full_table_name = f"{schema}.{table_name}" if schema else table_name
+                   limit: Optional[int] = None, cache: bool = False,
+                   columns: Optional[List[str]] = None, where: Optional[str] = None,
+                   partition_column: Optional[str] = None, lower_bound: Optional[int] = None,
+                   upper_bound: Optional[int] = None, num_partitions: int = 8,
+                   fetchsize: Optional[int] = None) -> DataFrame:
+        """
+        Read data from Redshift table with optimizations.
+        
+        columns, where and limit are pushed down to Redshift as a subquery, so only the
+        selected rows and columns cross JDBC. partition_column (an integer, date or timestamp
+        column, ideally the sort key) splits the read over num_partitions parallel connections;
+        missing bounds are looked up with one MIN/MAX query. fetchsize overrides JDBC_FETCH_SIZE
+        for this read (raise it for narrow rows, lower it for very wide ones).
+        Set cache=True only when the result feeds several actions; it is then materialized and counted.
+        """
+        full_table_name = self.qualify(schema, table_name)
         
         try:
-            logger.info(f"📖 Reading from {full_table_name} ({self.connection_type})")
+            # Hot-path messages use loguru's deferred "{}" formatting (see ETLService)
+            logger.info("📖 Reading from {} ({})", full_table_name, self.connection_type)
             
-            df = self.spark.read.jdbc(
-                url=self.jdbc_url,
-                table=full_table_name,
-                properties=self.connection_properties
-            )
+            source = full_table_name
+            if columns or where or (limit and limit > 0):
+                query = f"SELECT {', '.join(columns) if columns else '*'} FROM {full_table_name}"
+                if where:
+                    query += f" WHERE {where}"
+                if limit and limit > 0:
+                    query += f" LIMIT {int(limit)}"
+                    logger.info("🔢 Applied limit: {}", limit)
+                source = f"({query}) AS spark_src"
             
-            if limit and limit > 0:
-                df = df.limit(limit)
-                logger.info(f"🔢 Applied limit: {limit}")
+            if partition_column and not IDENTIFIER_PATTERN.match(partition_column):
+                raise ValueError(f"Invalid Redshift identifier: {partition_column!r}")
             
-            # Cache for potential reuse
-            df.cache()
-            row_count = df.count()
+            if partition_column and (lower_bound is None or upper_bound is None):
+                # One driver-side query, no Spark job
+                lo, hi = self.query_rows(
+                    f'SELECT MIN("{partition_column}"), MAX("{partition_column}") FROM {source}'
+                )[0]
+                lower_bound = self._partition_bound(lo) if lower_bound is None else lower_bound
+                upper_bound = self._partition_bound(hi) if upper_bound is None else upper_bound
+                
+                # Empty source: nothing to split, read over a single connection
+                if lower_bound is None or upper_bound is None:
+                    partition_column = None
+                else:
+                    logger.info("📐 {} bounds: {} → {}", partition_column, lower_bound, upper_bound)
             
-            logger.info(f"✅ Successfully read {row_count:,} rows from {full_table_name}")
+            reader = self._jdbc_reader(source)
+            if fetchsize:
+                reader = reader.option("fetchsize", str(fetchsize))
+            if partition_column:
+                reader = reader.options(
+                    partitionColumn=partition_column,
+                    lowerBound=str(lower_bound),
+                    upperBound=str(upper_bound),
+                    numPartitions=str(num_partitions)
+                )
+            df = reader.load()
+            
+            if cache:
+                # Serialized blocks that spill to disk, instead of cache()'s deserialized
+                # objects; callers unpersist when done
+                df.persist(StorageLevel.MEMORY_AND_DISK)
+                row_count = df.count()
+                logger.info("✅ Successfully read and cached {:,} rows from {}", row_count, full_table_name)
+            else:
+                logger.info("✅ Prepared lazy read of {}", full_table_name)
             return df
             
         except Exception as e:
             logger.exception(f"❌ Failed to read {full_table_name}: {str(e)}")
             raise RuntimeError(f"Read operation failed: {str(e)}") from e
     
-    def execute_sql(self, sql_query: str) -> DataFrame:
-        """Execute SQL query with enhanced error handling."""
+    @staticmethod
+    def _partition_bound(value):
+        """JDBC lowerBound/upperBound value: numbers (including DECIMAL) as integers, dates and timestamps as text."""
+        if value is None:
+            return None
+        if isinstance(value, (int, float, Decimal)):
+            return int(value)
+        return str(value)
+    
+    def execute_sql(self, sql_query: str, cache: bool = False) -> DataFrame:
+        """
+        Execute SQL query with enhanced error handling.
+        Set cache=True only when the result feeds several actions; it is then persisted
+        (see read_table), materialized and counted.
+        """
         try:
-            logger.info(f"🔍 Executing SQL query ({self.connection_type})")
-            logger.debug(f"Query preview: {sql_query[:200]}...")
-            
-            df = self.spark.read.jdbc(
-                url=self.jdbc_url,
-                table=f"({sql_query}) AS spark_query",
-                properties=self.connection_properties
-            )
+            logger.info("🔍 Executing SQL query ({})", self.connection_type)
+            logger.opt(lazy=True).debug("Query preview: {}...", lambda: sql_query[:200])
             
-            df.cache()
-            row_count = df.count()
+            df = self._jdbc_reader(f"({sql_query}) AS spark_query").load()
             
-            logger.info(f"✅ Query executed successfully, returned {row_count:,} rows")
+            if cache:
+                df.persist(StorageLevel.MEMORY_AND_DISK)
+                row_count = df.count()
+                logger.info("✅ Query executed and cached, returned {:,} rows", row_count)
+            else:
+                logger.info("✅ Query prepared (evaluated lazily by the next action)")
             return df
             
         except Exception as e:
             logger.exception(f"❌ SQL execution failed: {str(e)}")
             raise RuntimeError(f"SQL execution failed: {str(e)}") from e
     
-    def write_table(self, df: DataFrame, table_name: str, 
-                    schema: Optional[str] = None, mode: str = "append") -> None:
-        """Write DataFrame to Redshift with optimizations."""
-        full_table_name = f"{schema}.{table_name}" if schema else table_name
+    def read_table_unload(self, table_name: str, schema: Optional[str] = None,
+                          columns: Optional[List[str]] = None, where: Optional[str] = None,
+                          min_rows: int = UNLOAD_MIN_ROWS) -> DataFrame:
+        """
+        Read a large table through UNLOAD to Parquet in S3 instead of a row-by-row JDBC ResultSet.
+        
+        Every Redshift slice writes its own files under a prefix unique to this call, and Spark
+        reads them with the vectorized Parquet reader. The result is persisted and counted before
+        the prefix is deleted, so callers unpersist it when done. Tables under min_rows (per
+        SVV_TABLE_INFO), or any table without S3_IAM_ROLE, are read with read_table(cache=True),
+        where UNLOAD's S3 round-trip costs more than it saves.
+        """
+        if not self.settings.S3_IAM_ROLE:
+            logger.warning("⚠️ S3_IAM_ROLE is not configured, reading over JDBC instead of UNLOAD")
+            return self.read_table(table_name, schema, columns=columns, where=where, cache=True)
+        
+        full_table_name = self.qualify(schema, table_name)
+        
+        # Catalog row estimate; views and tables missing from SVV_TABLE_INFO go through UNLOAD
+        schema_filter = f"'{schema.lower()}'" if schema else "current_schema()"
+        table_rows = self.query_scalar(
+            f'SELECT tbl_rows FROM svv_table_info WHERE "schema" = {schema_filter} '
+            f"AND \"table\" = '{table_name.lower()}'"
+        )
+        if table_rows is not None and int(table_rows) < min_rows:
+            logger.info("📖 {} has about {:,} rows, reading over JDBC", full_table_name, int(table_rows))
+            return self.read_table(table_name, schema, columns=columns, where=where, cache=True)
+        
+        query = f"SELECT {', '.join(columns) if columns else '*'} FROM {full_table_name}"
+        if where:
+            query += f" WHERE {where}"
+        
+        # S3 keys use the unquoted name; the uuid keeps concurrent reads of one table apart
+        path_name = full_table_name.replace('"', '')
+        staging_path = f"{self.settings.S3_BUCKET}/redshift_unload/{path_name}/{uuid.uuid4().hex}/"
+        
+        jvm = self.spark.sparkContext._jvm
+        hadoop_path = jvm.org.apache.hadoop.fs.Path(f"s3a://{staging_path}")
+        fs = hadoop_path.getFileSystem(self.spark.sparkContext._jsc.hadoopConfiguration())
         
         try:
+            self.unload_query(query, f"s3://{staging_path}", self.settings.S3_IAM_ROLE)
+            
+            df = self.spark.read.parquet(f"s3a://{staging_path}").persist(StorageLevel.MEMORY_AND_DISK)
             row_count = df.count()
-            logger.info(f"📝 Writing {row_count:,} rows to {full_table_name} (mode: {mode})")
+            logger.info("✅ Read and cached {:,} rows from {} via UNLOAD", row_count, full_table_name)
+            return df
+        finally:
+            fs.delete(hadoop_path, True)
+    
+    def write_table(self, df: DataFrame, table_name: str, 
+                    schema: Optional[str] = None, mode: str = "append",
+                    use_copy: bool = False, row_count: Optional[int] = None) -> int:
+        """
+        Write DataFrame to Redshift with optimizations and return the number of rows written.
+        
+        use_copy=True stages Parquet in S3 and loads it with COPY (the bulk path Redshift is built
+        for); the table must already exist. Without S3_IAM_ROLE it falls back to JDBC inserts.
+        Pass row_count when the caller already knows it. Otherwise no Spark action is added:
+        COPY reports its own count, and JDBC writes are measured by COUNT(*) on Redshift before
+        and after (assumes no concurrent writers to the table).
+        """
+        full_table_name = self.qualify(schema, table_name)
+        
+        try:
+            logger.info(f"📝 Writing to {full_table_name} (mode: {mode})")
+            
+            if use_copy and self.settings.S3_IAM_ROLE:
+                copy_df = self.align_for_copy(df, table_name, schema)
+                if copy_df is not None:
+                    copied = self._write_via_copy(copy_df, table_name, schema, mode)
+                    if row_count is None:
+                        row_count = copied
+                    logger.info("✅ Successfully loaded {:,} rows into {} via COPY", row_count, full_table_name)
+                    return row_count
+                logger.warning("⚠️ Columns of {} differ from the DataFrame, writing over JDBC instead of COPY",
+                               full_table_name)
+            
+            # One connection per partition, capped by settings or, with 0, by executor cores.
+            # numPartitions coalesces above the cap and never shuffles below it
+            max_partitions = self.settings.JDBC_WRITE_PARTITIONS or self.spark.sparkContext.defaultParallelism
             
-            # Optimize partitions for writing
-            if row_count > 10000:
-                df = df.repartition(min(8, max(1, row_count // 10000)))
+            # Large batches, rewritten by the driver into multi-row INSERTs; lower
+            # JDBC_WRITE_BATCH_SIZE for very wide rows
+            write_properties = {
+                **self.connection_properties,
+                "batchsize": str(self.settings.JDBC_WRITE_BATCH_SIZE),
+                "numPartitions": str(max_partitions),
+                "reWriteBatchedInserts": "true"
+            }
+            
+            # Spark's "truncate" option is ignored for jdbc:redshift URLs and overwrite would
+            # DROP + CREATE the table, so empty an existing table here and append instead,
+            # keeping dist/sort keys, grants and column types. A missing table is created by append
+            write_mode = mode
+            table_exists = bool(self.get_table_columns(table_name, schema))
+            if mode == "overwrite":
+                if table_exists:
+                    self.truncate_table(table_name, schema)
+                write_mode = "append"
+            
+            rows_before = None
+            if row_count is None:
+                rows_before = self.get_table_count(table_name, schema) if table_exists else 0
             
             df.write.jdbc(
                 url=self.jdbc_url,
                 table=full_table_name,
-                mode=mode,
-                properties=self.connection_properties
+                mode=write_mode,
+                properties=write_properties
             )
             
-            logger.info(f"✅ Successfully wrote {row_count:,} rows to {full_table_name}")
+            if rows_before is not None:
+                row_count = self.get_table_count(table_name, schema) - rows_before
+            
+            logger.info("✅ Successfully wrote {:,} rows to {}", row_count, full_table_name)
+            return row_count
             
         except Exception as e:
             logger.exception(f"❌ Failed to write to {full_table_name}: {str(e)}")
             raise RuntimeError(f"Write operation failed: {str(e)}") from e
     
-    def execute_ddl(self, sql_statement: str) -> bool:
+    def align_for_copy(self, df: DataFrame, table_name: str,
+                       schema: Optional[str] = None) -> Optional[DataFrame]:
         """
-        PURE SPARK: Execute DDL using Spark-native operations only.
-        No psycopg2 dependencies.
-        """
-        try:
-            logger.info(f"⚙️ Executing DDL using pure Spark ({self.connection_type})")
-            logger.debug(f"Statement: {sql_statement}")
-            
-            # For most DDL operations, we use Spark-native alternatives
-            if "TRUNCATE" in sql_statement.upper():
-                # Extract table name from TRUNCATE statement
-                import re
-                match = re.search(r'TRUNCATE\s+TABLE\s+(\S+)', sql_statement, re.IGNORECASE)
-                if match:
-                    table_full_name = match.group(1)
-                    if '.' in table_full_name:
-                        schema, table = table_full_name.split('.', 1)
-                        self.truncate_table(table, schema)
-                    else:
-                        self.truncate_table(table_full_name)
-                    return True
-                else:
-                    raise ValueError("Could not parse table name from TRUNCATE statement")
+        Select df's columns in the table's ordinal order, as COPY from Parquet maps by position.
+        Returns None when the column names (compared case-insensitively) differ from the table's.
+        """
+        table_columns = self.get_table_columns(table_name, schema)
+        df_columns = {column.lower(): column for column in df.columns}
+        table_keys = [column.lower() for column in table_columns]
+        
+        if not table_keys or set(table_keys) != set(df_columns):
+            logger.debug("Column mismatch for {} (missing: {}, extra: {})", table_name,
+                         sorted(set(table_keys) - set(df_columns)), sorted(set(df_columns) - set(table_keys)))
+            return None
+        return df.select(*[df_columns[key] for key in table_keys])
+    
+    def _write_via_copy(self, df: DataFrame, table_name: str, schema: Optional[str], mode: str) -> int:
+        """
+        Stage df as Parquet under a unique S3 prefix, COPY it into the table, then remove the prefix.
+        Returns the row count reported by COPY.
+        """
+        full_table_name = self.qualify(schema, table_name)
+        path_name = full_table_name.replace('"', '')
+        staging_path = f"{self.settings.S3_BUCKET}/redshift_staging/{path_name}/{uuid.uuid4().hex}/"
+        
+        jvm = self.spark.sparkContext._jvm
+        hadoop_path = jvm.org.apache.hadoop.fs.Path(f"s3a://{staging_path}")
+        fs = hadoop_path.getFileSystem(self.spark.sparkContext._jsc.hadoopConfiguration())
+        
+        try:
+            # Snappy for the same COPY-compatibility reason as JcapPaEtlService._stage_to_s3
+            df.write.mode("overwrite").option("compression", "snappy").parquet(f"s3a://{staging_path}")
+            
+            # The manifest skips the committer's _SUCCESS marker (JSON under the S3A committers).
+            # Overwrite deletes and loads in one transaction, so a failed COPY keeps the old rows
+            return self.copy_from_s3(table_name, self.write_copy_manifest(f"s3://{staging_path}"),
+                              self.settings.S3_IAM_ROLE, schema=schema, manifest=True,
+                              replace=mode == "overwrite")
+        finally:
+            fs.delete(hadoop_path, True)
+    
+    def execute_statement(self, sql_statement: str) -> int:
+        """
+        Run a non-query statement (COPY, INSERT ... SELECT, ...) on Redshift.
+        Uses a JDBC connection opened on the driver JVM, so no extra Python driver is needed.
+        Returns the update count of the first statement (-1 if it reports none).
+        """
+        connection = self._connect()
+        try:
+            statement = connection.createStatement()
+            try:
+                statement.execute(sql_statement)
+                return statement.getUpdateCount()
+            finally:
+                statement.close()
+        finally:
+            connection.close()
+    
+    def query_scalar(self, sql_query: str):
+        """Run a single-value query on the driver JDBC connection, without a Spark job."""
+        connection = self._connect()
+        try:
+            statement = connection.createStatement()
+            try:
+                result = statement.executeQuery(sql_query)
+                return result.getObject(1) if result.next() else None
+            finally:
+                statement.close()
+        finally:
+            connection.close()
+    
+    def query_rows(self, sql_query: str) -> List[tuple]:
+        """Run a small multi-row query on the driver JDBC connection, without a Spark job."""
+        connection = self._connect()
+        try:
+            statement = connection.createStatement()
+            try:
+                result = statement.executeQuery(sql_query)
+                width = result.getMetaData().getColumnCount()
+                rows = []
+                while result.next():
+                    rows.append(tuple(result.getObject(i) for i in range(1, width + 1)))
+                return rows
+            finally:
+                statement.close()
+        finally:
+            connection.close()
+    
+    def _connect(self):
+        """Get a JDBC connection on the driver JVM, pooled when HikariCP is available; callers must close it."""
+        with self._pool_lock:
+            if self._data_source is None:
+                self._data_source = self._create_data_source()
+        
+        if self._data_source is not False:
+            # close() on a pooled connection hands it back to the pool
+            return self._data_source.getConnection()
+        
+        # Unpooled fallback: driver instance and Java Properties are built once, then reused
+        if self._driver is None:
+            jvm = self.spark.sparkContext._jvm
+            
+            # Load the driver through Spark's classloader so jars added via spark.jars are visible
+            loader = jvm.java.lang.Thread.currentThread().getContextClassLoader()
+            driver = loader.loadClass(self.connection_properties["driver"]).newInstance()
+            
+            props = jvm.java.util.Properties()
+            for key, value in self.connection_properties.items():
+                props.setProperty(key, value)
+            
+            self._driver, self._java_props = driver, props
+        
+        return self._driver.connect(self.jdbc_url, self._java_props)
+    
+    def _create_data_source(self):
+        """
+        Build a HikariCP pool for this connection, or return False to fall back to plain connections.
+        HikariCP 5.x needs Java 11+; on an older JVM loading it fails and plain connections are used.
+        """
+        jvm = self.spark.sparkContext._jvm
+        
+        try:
+            config = jvm.com.zaxxer.hikari.HikariConfig()
+        except Exception as e:
+            logger.warning(f"⚠️ HikariCP not on the classpath, using unpooled JDBC connections: {str(e)}")
+            return False
+        
+        config.setPoolName(f"redshift-{self.connection_type}")
+        config.setJdbcUrl(self.jdbc_url)
+        config.setDriverClassName(self.connection_properties["driver"])
+        config.setUsername(self.connection_properties["user"])
+        config.setPassword(self.connection_properties["password"])
+        config.setMaximumPoolSize(self.settings.JDBC_POOL_SIZE)
+        config.setMinimumIdle(0)
+        config.addDataSourceProperty("loginTimeout", self.connection_properties["loginTimeout"])
+        config.addDataSourceProperty("socketTimeout", self.connection_properties["socketTimeout"])
+        
+        try:
+            data_source = jvm.com.zaxxer.hikari.HikariDataSource(config)
+        except Exception as e:
+            logger.warning(f"⚠️ HikariCP pool could not start, using unpooled JDBC connections: {str(e)}")
+            return False
+        
+        _POOLED_CONNECTORS.add(self)
+        logger.info(f"🏊 JDBC connection pool created for {self.connection_type} (max {self.settings.JDBC_POOL_SIZE})")
+        return data_source
+    
+    def close(self) -> None:
+        """Close the driver-side connection pool, if one was created."""
+        with self._pool_lock:
+            if self._data_source:
+                self._data_source.close()
+            self._data_source = None
+        _POOLED_CONNECTORS.discard(self)
+    
+    def copy_from_s3(self, table_name: str, s3_path: str, iam_role: str,
+                     schema: Optional[str] = None, file_format: str = "PARQUET",
+                     manifest: bool = False, replace: bool = False) -> int:
+        """
+        Bulk load files staged in S3 with Redshift COPY (parallel across slices).
+        With manifest=True, s3_path is a manifest file listing exactly the files to load.
+        replace=True deletes the current rows and loads in one transaction, so a failed
+        COPY leaves the table as it was. Returns the driver-reported row count (-1 if not reported).
+        """
+        full_table_name = self.qualify(schema, table_name)
+        
+        try:
+            logger.info(f"📥 COPY {full_table_name} from {s3_path} ({file_format})")
+            
+            copy_statement = (
+                f"COPY {full_table_name} FROM '{s3_path}' "
+                f"IAM_ROLE '{iam_role}' FORMAT AS {file_format}"
+                f"{' MANIFEST' if manifest else ''}"
+            )
+            if replace:
+                # DELETE rather than TRUNCATE, which would commit before the COPY runs
+                row_count = self.execute_ddls(
+                    [f"DELETE FROM {full_table_name}", copy_statement], atomic=True
+                )
             else:
-                # For other DDL operations, we don't need them in our ETL
-                logger.warning(f"⚠️ DDL operation skipped - not needed for pure Spark ETL: {sql_statement[:50]}")
-                return True
+                row_count = self.execute_statement(copy_statement)
+            
+            logger.info(f"✅ COPY into {full_table_name} completed")
+            return row_count
+            
+        except Exception as e:
+            logger.exception(f"❌ COPY into {full_table_name} failed: {str(e)}")
+            raise RuntimeError(f"COPY operation failed: {str(e)}") from e
+    
+    def write_copy_manifest(self, s3_path: str) -> str:
+        """
+        Write a COPY manifest listing only the part-*.parquet files under s3_path and return its s3:// URL.
+        
+        Committer markers such as _SUCCESS (a JSON report under the S3A committers) are left out,
+        so COPY never tries to parse them as Parquet. Columnar COPY needs each file's content_length.
+        """
+        prefix = s3_path.split("://", 1)[-1].rstrip("/")
+        
+        jvm = self.spark.sparkContext._jvm
+        hadoop_path = jvm.org.apache.hadoop.fs.Path(f"s3a://{prefix}/")
+        fs = hadoop_path.getFileSystem(self.spark.sparkContext._jsc.hadoopConfiguration())
+        
+        entries = [
+            {
+                "url": f"s3://{prefix}/{status.getPath().getName()}",
+                "mandatory": True,
+                "meta": {"content_length": status.getLen()}
+            }
+            for status in fs.listStatus(hadoop_path)
+            if status.isFile()
+            and status.getPath().getName().startswith("part-")
+            and status.getPath().getName().endswith(".parquet")
+        ]
+        if not entries:
+            raise RuntimeError(f"No part-*.parquet files found under s3://{prefix}/")
+        
+        # Underscore prefix: Spark's Parquet reader skips it like the committer's own markers
+        manifest_path = jvm.org.apache.hadoop.fs.Path(f"s3a://{prefix}/_copy_manifest")
+        stream = fs.create(manifest_path, True)
+        try:
+            stream.write(bytearray(json.dumps({"entries": entries}).encode("utf-8")))
+        finally:
+            stream.close()
+        
+        logger.info("🧾 COPY manifest lists {} file(s) under s3://{}/", len(entries), prefix)
+        return f"s3://{prefix}/_copy_manifest"
+    
+    def get_table_columns(self, table_name: str, schema: Optional[str] = None) -> List[str]:
+        """Column names of a table in ordinal_position order (the order COPY from Parquet maps by)."""
+        # Validated identifiers; unquoted names are stored lowercase in the catalog
+        self.qualify(schema, table_name)
+        schema_filter = f"'{schema.lower()}'" if schema else "current_schema()"
+        rows = self.query_rows(
+            "SELECT column_name FROM information_schema.columns "
+            f"WHERE table_schema = {schema_filter} AND table_name = '{table_name.lower()}' "
+            "ORDER BY ordinal_position"
+        )
+        return [row[0] for row in rows]
+    
+    def unload_query(self, sql_query: str, s3_path: str, iam_role: str,
+                     file_format: str = "PARQUET", parallel: bool = True,
+                     manifest: bool = False) -> str:
+        """
+        Export query results straight to S3 with Redshift UNLOAD (written by every slice).
+        manifest=True also writes <s3_path>manifest with file sizes, as COPY needs for columnar files.
+        """
+        try:
+            logger.info(f"📤 UNLOAD query to {s3_path} ({file_format})")
+            logger.opt(lazy=True).debug("Query preview: {}...", lambda: sql_query[:200])
+            
+            # UNLOAD takes the query as a string literal, so embedded quotes are doubled
+            escaped_query = sql_query.replace("'", "''")
+            self.execute_statement(
+                f"UNLOAD ('{escaped_query}') TO '{s3_path}' "
+                f"IAM_ROLE '{iam_role}' FORMAT AS {file_format} "
+                f"PARALLEL {'ON' if parallel else 'OFF'} CLEANPATH"
+                f"{' MANIFEST VERBOSE' if manifest else ''}"
+            )
+            
+            logger.info(f"✅ UNLOAD to {s3_path} completed")
+            return s3_path
+            
+        except Exception as e:
+            logger.exception(f"❌ UNLOAD to {s3_path} failed: {str(e)}")
+            raise RuntimeError(f"UNLOAD operation failed: {str(e)}") from e
+    
+    def execute_ddl(self, sql_statement: str) -> bool:
+        """
+        Execute a DDL statement (or several, separated by semicolons) directly over JDBC.
+        Runs in autocommit mode; use execute_ddls for statements that must commit together.
+        """
+        try:
+            logger.info("⚙️ Executing DDL ({})", self.connection_type)
+            logger.debug("Statement: {}", sql_statement)
+            
+            self.execute_statement(sql_statement)
+            return True
+            
+        except Exception as e:
+            logger.exception(f"❌ DDL execution failed: {str(e)}")
+            raise RuntimeError(f"DDL execution failed: {str(e)}") from e
+    
+    def execute_ddls(self, statements: List[str], atomic: bool = True) -> int:
+        """
+        Execute several statements on one pooled connection, e.g. CREATE staging → COPY → swap → DROP.
+        
+        atomic=True runs them in one transaction and rolls back on failure. Redshift commits
+        implicitly on TRUNCATE and some ALTER TABLE forms, so use DELETE in atomic batches.
+        Returns the update count of the last statement (-1 if it reports none).
+        """
+        try:
+            logger.info("⚙️ Executing {} DDL statement(s) ({})", len(statements), self.connection_type)
+            
+            connection = self._connect()
+            try:
+                connection.setAutoCommit(not atomic)
+                statement = connection.createStatement()
+                try:
+                    update_count = -1
+                    for sql_statement in statements:
+                        logger.debug("Statement: {}", sql_statement)
+                        statement.execute(sql_statement)
+                        update_count = statement.getUpdateCount()
+                    if atomic:
+                        connection.commit()
+                    return update_count
+                except Exception:
+                    if atomic:
+                        connection.rollback()
+                    raise
+                finally:
+                    statement.close()
+            finally:
+                # Pooled connections are reused, so hand them back in autocommit mode
+                connection.setAutoCommit(True)
+                connection.close()
             
         except Exception as e:
             logger.exception(f"❌ DDL execution failed: {str(e)}")
             raise RuntimeError(f"DDL execution failed: {str(e)}") from e
     
     def get_table_count(self, table_name: str, schema: Optional[str] = None) -> int:
-        """Get table row count efficiently."""
-        full_table_name = f"{schema}.{table_name}" if schema else table_name
+        """Get table row count with a COUNT(*) answered by Redshift."""
+        full_table_name = self.qualify(schema, table_name)
         
         try:
-            logger.debug(f"🔢 Getting count for {full_table_name}")
+            logger.debug("🔢 Getting count for {}", full_table_name)
             
-            count_df = self.execute_sql(f"SELECT COUNT(*) as cnt FROM {full_table_name}")
-            count = count_df.collect()[0]['cnt']
+            # Scalar read over the driver connection; no DataFrame or Spark job for one number
+            count = int(self.query_scalar(f"SELECT COUNT(*) FROM {full_table_name}"))
             
-            logger.debug(f"📊 {full_table_name}: {count:,} rows")
+            logger.debug("📊 {}: {:,} rows", full_table_name, count)
             return count
             
         except Exception as e:
             logger.exception(f"❌ Failed to get count for {full_table_name}: {str(e)}")
             raise RuntimeError(f"Count operation failed: {str(e)}") from e
     
+    def get_table_counts(self, tables: List[Tuple[Optional[str], str]]) -> Dict[str, int]:
+        """
+        Count several tables with one UNION ALL query (one round-trip on a pooled driver connection).
+        tables holds (schema, table) pairs; results are keyed by "schema.table" (or "table").
+        """
+        names = [f"{schema}.{table}" if schema else table for schema, table in tables]
+        
+        try:
+            logger.debug("🔢 Getting counts for {}", names)
+            
+            count_query = " UNION ALL ".join(
+                f"SELECT '{name}' AS name, COUNT(*) AS cnt FROM {self.qualify(schema, table)}"
+                for name, (schema, table) in zip(names, tables)
+            )
+            counts = {name: int(cnt) for name, cnt in self.query_rows(count_query)}
+            
+            logger.debug("📊 Table counts: {}", counts)
+            return counts
+            
+        except Exception as e:
+            logger.exception(f"❌ Failed to get counts for {', '.join(names)}: {str(e)}")
+            raise RuntimeError(f"Count operation failed: {str(e)}") from e
+    
     def truncate_table(self, table_name: str, schema: Optional[str] = None) -> None:
-        """FIXED: Truncate table using Spark-native approach."""
-        full_table_name = f"{schema}.{table_name}" if schema else table_name
+        """Truncate table with a single TRUNCATE statement; grants, keys and column types are kept."""
+        full_table_name = self.qualify(schema, table_name)
         
         try:
             logger.info(f"🗑️ Truncating {full_table_name}")
-            
-            # Method 1: Try Spark-native approach first
-            try:
-                # Read table structure (1 row to get schema)
-                existing_df = self.read_table(table_name, schema, limit=1)
-                empty_df = existing_df.limit(0)  # Same schema, 0 rows
-                
-                # Overwrite with empty DataFrame
-                self.write_table(empty_df, table_name, schema, mode="overwrite")
-                
-                logger.info(f"✅ Successfully truncated {full_table_name} using Spark")
-                return
-                
-            except Exception as spark_error:
-                logger.warning(f"⚠️ Spark truncate failed, trying DDL: {spark_error}")
-                
-                # Method 2: Fallback to DDL TRUNCATE
-                self.execute_ddl(f"TRUNCATE TABLE {full_table_name}")
-                logger.info(f"✅ Successfully truncated {full_table_name} using DDL")
+            self.execute_statement(f"TRUNCATE TABLE {full_table_name}")
+            logger.info(f"✅ Successfully truncated {full_table_name}")
             
         except Exception as e:
             logger.exception(f"❌ Failed to truncate {full_table_name}: {str(e)}")
@@ -224,24 +712,79 @@ class RedshiftConnector:
     
     def copy_table_data(self, source_table: str, dest_table: str,
                        source_schema: Optional[str] = None, 
-                       dest_schema: Optional[str] = None) -> int:
-        """FIXED: Copy data between tables using pure Spark."""
-        source_name = f"{source_schema}.{source_table}" if source_schema else source_table
-        dest_name = f"{dest_schema}.{dest_table}" if dest_schema else dest_table
+                       dest_schema: Optional[str] = None,
+                       dest_connector: Optional["RedshiftConnector"] = None,
+                       iam_role: Optional[str] = None, dest_iam_role: Optional[str] = None) -> int:
+        """
+        Copy data between tables without passing rows through Spark.
+        Same cluster: INSERT ... SELECT. Another connector's cluster: UNLOAD here with iam_role,
+        COPY there with dest_iam_role. Each role must be attached to its own cluster; both default
+        to S3_IAM_ROLE, which then has to be attached to both clusters.
+        """
+        source_name = self.qualify(source_schema, source_table)
+        dest_name = self.qualify(dest_schema, dest_table)
         
         try:
             logger.info(f"🔄 Copying {source_name} → {dest_name}")
             
-            # Read source data
-            source_df = self.read_table(source_table, source_schema)
-            rows_to_copy = source_df.count()
+            if dest_connector is not None and dest_connector.jdbc_url != self.jdbc_url:
+                return self._copy_across_clusters(
+                    source_name, dest_table, dest_schema, dest_connector,
+                    iam_role or self.settings.S3_IAM_ROLE,
+                    dest_iam_role or dest_connector.settings.S3_IAM_ROLE
+                )
             
-            # Write to destination
-            self.write_table(source_df, dest_table, dest_schema, mode="append")
+            # Both tables live on this connector's cluster, so no rows pass through Spark
+            rows_to_copy = self.execute_statement(f"INSERT INTO {dest_name} SELECT * FROM {source_name}")
             
             logger.info(f"✅ Successfully copied {rows_to_copy:,} rows")
             return rows_to_copy
             
         except Exception as e:
             logger.exception(f"❌ Failed to copy data: {str(e)}")
-            raise RuntimeError(f"Copy operation failed: {str(e)}") from e
\ No newline at end of file
+            raise RuntimeError(f"Copy operation failed: {str(e)}") from e
+    
+    def _copy_across_clusters(self, source_name: str, dest_table: str, dest_schema: Optional[str],
+                              dest_connector: "RedshiftConnector", iam_role: str, dest_iam_role: str) -> int:
+        """UNLOAD source_name to a unique S3 prefix, COPY it through the manifest, then remove the prefix."""
+        if not iam_role or not dest_iam_role:
+            raise ValueError("IAM roles for both clusters are required to copy between clusters")
+        
+        # COPY from Parquet maps columns by position, so unload in the destination's column order
+        dest_columns = dest_connector.get_table_columns(dest_table, dest_schema)
+        if not dest_columns:
+            raise ValueError(f"Destination table {dest_table} not found")
+        select_list = ", ".join(f'"{column}"' for column in dest_columns)
+        
+        staging_path = f"{self.settings.S3_BUCKET}/redshift_copy/{uuid.uuid4().hex}/"
+        
+        jvm = self.spark.sparkContext._jvm
+        hadoop_path = jvm.org.apache.hadoop.fs.Path(f"s3a://{staging_path}")
+        fs = hadoop_path.getFileSystem(self.spark.sparkContext._jsc.hadoopConfiguration())
+        
+        try:
+            self.unload_query(f"SELECT {select_list} FROM {source_name}", f"s3://{staging_path}",
+                              iam_role, manifest=True)
+            # The manifest lists exactly the files this UNLOAD wrote
+            rows_copied = dest_connector.copy_from_s3(
+                dest_table, f"s3://{staging_path}manifest", dest_iam_role,
+                schema=dest_schema, manifest=True
+            )
+            logger.info(f"✅ Copied {source_name} across clusters ({rows_copied:,} rows reported by COPY)")
+            return rows_copied
+        finally:
+            fs.delete(hadoop_path, True)
+
+@lru_cache(maxsize=None)
+def get_redshift_connector(spark, connection_type: str = "poc") -> RedshiftConnector:
+    """Get the shared RedshiftConnector for a Spark session and connection type."""
+    return RedshiftConnector(spark, connection_type=connection_type)
+
+def close_redshift_connectors() -> None:
+    """Close every connector's driver-side pool; call before stopping the Spark session."""
+    for connector in list(_POOLED_CONNECTORS):
+        try:
+            connector.close()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close {connector.connection_type} connection pool: {str(e)}")
+    get_redshift_connector.cache_clear()
@@ -0,0 +1,265 @@
+"""
+AWS Secrets Manager utility for retrieving secure configuration values.
+Environment-aware implementation supporting dev/prod with same variable structure.
+
+Usage:
+- Dev environment: AWS_SECRET_NAME=jph-eks-dev-secret
+- Prod environment: AWS_SECRET_NAME=jph-eks-prod-secret
+- Both use same variable names (REDSHIFT_HOST, CDP_REDSHIFT_HOST, K8S_MASTER_URL, etc.)
+"""
+import os
+import re
+import stat
+import json
+import time
+import tempfile
+import threading
+from functools import lru_cache
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from loguru import logger
+from typing import Dict, Any, Optional
+from core.config import get_settings
+
+# orjson parses bytes directly and is faster; its JSONDecodeError subclasses json's, so
+# the handlers below work with either parser
+try:
+    import orjson
+    _parse_json = orjson.loads
+except ImportError:
+    _parse_json = json.loads
+
+# Shared client configuration: reuse TCP/TLS connections across calls
+CLIENT_CONFIG = Config(
+    max_pool_connections=10,
+    retries={"max_attempts": 5, "mode": "adaptive"},
+    connect_timeout=2,
+    read_timeout=5,
+    tcp_keepalive=True
+)
+
+@lru_cache(maxsize=1)
+def _get_boto_session() -> boto3.session.Session:
+    """Shared boto3 session, so the credential chain is resolved once per process."""
+    return boto3.session.Session()
+
+# Secrets Manager clients by region; clients are thread-safe and costly to build (service model load)
+_CLIENT_CACHE: Dict[str, Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+def _get_client(region_name: str):
+    """Get the shared Secrets Manager client for a region, creating it once."""
+    with _CLIENT_CACHE_LOCK:
+        if region_name not in _CLIENT_CACHE:
+            _CLIENT_CACHE[region_name] = _get_boto_session().client(
+                service_name='secretsmanager',
+                region_name=region_name,
+                config=CLIENT_CONFIG
+            )
+        return _CLIENT_CACHE[region_name]
+
+# Opt-in: with SECRETS_CACHE_TTL > 0 (seconds, read at call time) the decrypted secret JSON is
+# cached on tmpfs so restarts within the TTL skip the AWS call. Files live in a per-uid 0700
+# directory and are only trusted when owned by this uid with no group/other permissions.
+SECRETS_CACHE_DIR = "/dev/shm"
+
+def _secrets_cache_ttl() -> int:
+    """Disk cache TTL in seconds; 0 (the default) disables the cache."""
+    try:
+        return int(os.environ.get("SECRETS_CACHE_TTL", "0"))
+    except ValueError:
+        logger.warning("⚠️ SECRETS_CACHE_TTL is not an integer - secret disk cache disabled")
+        return 0
+
+def _is_private(st: os.stat_result) -> bool:
+    """True if a stat result is owned by this process's uid with no group/other permissions."""
+    return st.st_uid == os.getuid() and st.st_mode & 0o077 == 0
+
+class SecretsManager:
+    """
+    Utility class for retrieving configuration from AWS Secrets Manager.
+    Handles caching and error recovery.
+    """
+    
+    # Parsed secrets shared by all instances, keyed by (secret_name, region_name)
+    _SECRET_CACHE: Dict[tuple, Dict[str, Any]] = {}
+    _SECRET_CACHE_LOCK = threading.Lock()
+    
+    def __init__(self, secret_name: str = None, region_name: str = "us-east-1"):
+        """
+        Initialize Secrets Manager client.
+        
+        Args:
+            secret_name: Name of the secret in AWS Secrets Manager (auto-detected if None)
+            region_name: AWS region where secret is stored
+        """
+        # Auto-detect secret name based on environment if not provided
+        if secret_name is None:
+            # Check for environment-specific secret name
+            secret_name = os.environ.get('AWS_SECRET_NAME', 'jph-eks-dev-secret')
+        
+        
+        #self.settings = get_settings()
+        #self.secret_name = self.settings.AWS_SECRET_NAME #secret_name
+        self.secret_name = secret_name
+        self.region_name = region_name
+        self._cached_secret = None
+        
+        # Shared per-region client with pooled keep-alive connections and adaptive retries
+        self.client = _get_client(region_name)
+        
+        logger.info(f"🔐 Secrets Manager initialized for secret: {secret_name}")
+        logger.info(f"🌍 Region: {region_name}")
+    
+    def get_secret_values(self) -> Dict[str, Any]:
+        """
+        Retrieve and parse secret values from AWS Secrets Manager.
+        
+        Returns:
+            Dictionary containing all secret key-value pairs
+        """
+        if self._cached_secret is not None:
+            return self._cached_secret
+        
+        # Double-checked: only one thread per process loads a given secret
+        cache_key = (self.secret_name, self.region_name)
+        with SecretsManager._SECRET_CACHE_LOCK:
+            if cache_key not in SecretsManager._SECRET_CACHE:
+                SecretsManager._SECRET_CACHE[cache_key] = self._load_secret_values()
+            self._cached_secret = SecretsManager._SECRET_CACHE[cache_key]
+        return self._cached_secret
+    
+    def _load_secret_values(self) -> Dict[str, Any]:
+        """Load the secret from the tmpfs cache or, failing that, from AWS."""
+        secret_dict = self._read_disk_cache()
+        if secret_dict is not None:
+            logger.info(f"✅ Loaded secret {self.secret_name} from local cache ({len(secret_dict)} keys)")
+            return secret_dict
+        
+        try:
+            logger.info(f"🔍 Retrieving secret: {self.secret_name}")
+            
+            get_secret_value_response = self.client.get_secret_value(
+                SecretId=self.secret_name
+            )
+            
+            secret_string = get_secret_value_response['SecretString']
+            secret_dict = _parse_json(secret_string)
+            self._write_disk_cache(secret_string)
+            
+            logger.info(f"✅ Successfully retrieved secret with {len(secret_dict)} keys")
+            logger.debug(f"🔑 Secret keys: {list(secret_dict.keys())}")
+            return secret_dict
+            
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            logger.error(f"❌ Failed to retrieve secret {self.secret_name}: {error_code}")
+            
+            if error_code == 'DecryptionFailureException':
+                logger.error("Secret can't be decrypted using the provided KMS key")
+            elif error_code == 'InternalServiceErrorException':
+                logger.error("An error occurred on the server side")
+            elif error_code == 'InvalidParameterException':
+                logger.error("Invalid parameter provided")
+            elif error_code == 'InvalidRequestException':
+                logger.error("Invalid request parameter")
+            elif error_code == 'ResourceNotFoundException':
+                logger.error("Secret not found - please verify secret name and permissions")
+            elif error_code == 'AccessDeniedException':
+                logger.error("Access denied - please verify IAM permissions for Secrets Manager")
+            
+            raise e
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Failed to parse secret JSON: {str(e)}")
+            raise e
+        except Exception as e:
+            logger.error(f"❌ Unexpected error retrieving secret: {str(e)}")
+            raise e
+    
+    def _disk_cache_path(self) -> Optional[str]:
+        """Get the cache file path in the private per-uid directory, or None if caching is off or unsafe."""
+        if _secrets_cache_ttl() <= 0 or not os.path.isdir(SECRETS_CACHE_DIR):
+            return None
+        
+        cache_dir = os.path.join(SECRETS_CACHE_DIR, f"etl-secrets-{os.getuid()}")
+        try:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            st = os.lstat(cache_dir)
+        except OSError as e:
+            logger.warning(f"⚠️ Secret disk cache disabled: {str(e)}")
+            return None
+        if not stat.S_ISDIR(st.st_mode) or not _is_private(st):
+            logger.warning(f"⚠️ Secret disk cache disabled: {cache_dir} is not a private directory of this user")
+            return None
+        
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', self.secret_name)
+        return os.path.join(cache_dir, f"{safe_name}.json")
+    
+    def _read_disk_cache(self) -> Optional[Dict[str, Any]]:
+        """Read the cached secret if it is a private regular file younger than the TTL."""
+        path = self._disk_cache_path()
+        if path is None:
+            return None
+        try:
+            st = os.lstat(path)
+            if not stat.S_ISREG(st.st_mode) or not _is_private(st):
+                logger.warning(f"⚠️ Ignoring secret cache file with unsafe owner or mode: {path}")
+                return None
+            if time.time() - st.st_mtime > _secrets_cache_ttl():
+                return None
+            with open(path, 'rb') as f:
+                return _parse_json(f.read())
+        except (OSError, json.JSONDecodeError):
+            return None
+    
+    def _write_disk_cache(self, secret_string: str) -> None:
+        """Atomically write the secret (mode 0600) into the private cache directory."""
+        path = self._disk_cache_path()
+        if path is None:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, 'w') as f:
+                f.write(secret_string)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Secret disk cache not written: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def get_secret_value(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """
+        Get a specific value from the secret.
+        
+        Args:
+            key: Key to retrieve from secret
+            default: Default value if key not found
+            
+        Returns:
+            Secret value or default
+        """
+        try:
+            secret_dict = self.get_secret_values()
+            value = secret_dict.get(key, default)
+            if value:
+                logger.debug(f"🔑 Retrieved {key}: {'*' * min(len(str(value)), 8)}")
+            return value
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to get secret value for {key}, using default: {str(e)}")
+            return default
+
+# Global instance for reuse
+_secrets_manager = None
+_secrets_manager_lock = threading.Lock()
+
+def get_secrets_manager() -> SecretsManager:
+    """Get or create global SecretsManager instance (thread-safe)."""
+    global _secrets_manager
+    if _secrets_manager is None:
+        with _secrets_manager_lock:
+            if _secrets_manager is None:
+                _secrets_manager = SecretsManager()
+    return _secrets_manager
+    #return SecretsManager(secret_name=secret_name)
\ No newline at end of file